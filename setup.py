@@ -29,6 +29,10 @@ setup(name="tldrstory",
           "streamlit>=0.68.0",
           "txtai[api]>=3.2.0"
       ],
+      extras_require={
+          "export": ["pyarrow>=1.0.0"],
+          "postgres": ["psycopg2>=2.8.0"]
+      },
       classifiers=[
           "License :: OSI Approved :: Apache Software License",
           "Operating System :: OS Independent",
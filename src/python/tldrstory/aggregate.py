@@ -0,0 +1,133 @@
+"""
+Aggregate module
+"""
+
+import json
+import logging
+import os
+
+class Aggregate(object):
+    """
+    Builds summary statistics over all stored articles. Statistics are stored as a JSON file in the index path and served by the API.
+    """
+
+    # Number of histogram bins for label scores
+    BINS = 10
+
+    @staticmethod
+    def build(index, database):
+        """
+        Builds and stores aggregate statistics.
+
+        Args:
+            index: index configuration
+            database: database handle
+        """
+
+        # Score categories have a single aggregate value per article, other categories have one value per label
+        categories = [name for name, config in index["labels"].items() if "aggregate" in config]
+        params = ", ".join(["?"] * len(categories))
+
+        aggregates = {"articles": 0, "days": [], "scores": {}, "topics": {}}
+
+        # Article counts
+        aggregates["articles"] = database.query("SELECT COUNT(*) FROM articles")[0][0]
+
+        rows = database.query("SELECT SUBSTR(CAST(Date AS TEXT), 1, 10) AS day, COUNT(*) FROM articles GROUP BY day ORDER BY day")
+        aggregates["days"] = [list(row) for row in rows if row[0]]
+
+        # Score means and histograms
+        for category in categories:
+            aggregates["scores"][category] = {"mean": None, "histogram": [0] * Aggregate.BINS}
+
+        # Histogram bins are counted with CASE expressions, works the same across database backends
+        bins = ", ".join(["SUM(CASE WHEN Value >= %.2f%s THEN 1 ELSE 0 END)" %
+                          (x / Aggregate.BINS, " AND Value < %.2f" % ((x + 1) / Aggregate.BINS) if x < Aggregate.BINS - 1 else "")
+                          for x in range(Aggregate.BINS)])
+
+        # Skip score queries when no categories are aggregated
+        rows = database.query("SELECT Category, AVG(Value), %s FROM labels WHERE Category IN (%s) GROUP BY Category" % (bins, params),
+                              categories) if categories else []
+        for row in rows:
+            aggregates["scores"][row[0]]["mean"] = row[1]
+            aggregates["scores"][row[0]]["histogram"] = [int(count) for count in row[2:]]
+
+        # Topic article counts and score means, uses the same topic threshold as the API
+        for topic, count in database.query("SELECT Name, COUNT(*) FROM labels WHERE Category = 'topic' AND Value >= 0.5 GROUP BY Name"):
+            aggregates["topics"][topic] = {"articles": count, "scores": {}}
+
+        rows = database.query("SELECT t.Name, l.Category, AVG(l.Value) FROM labels t JOIN labels l ON l.Article = t.Article " +
+                              "WHERE t.Category = 'topic' AND t.Value >= 0.5 AND l.Category IN (%s) GROUP BY t.Name, l.Category" % params,
+                              categories) if categories else []
+        for topic, category, mean in rows:
+            aggregates["topics"][topic]["scores"][category] = mean
+
+        # Write to a temporary file and rename, readers never see a partial file
+        path = os.path.join(index["path"], "aggregates.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(aggregates, f)
+
+        os.replace(path + ".tmp", path)
+
+        logging.info("Stored aggregates for %d articles", aggregates["articles"])
+
+    @staticmethod
+    def merge(aggregates):
+        """
+        Merges aggregate statistics from multiple indexes.
+
+        Args:
+            aggregates: list of aggregate statistics
+
+        Returns:
+            merged aggregate statistics
+        """
+
+        aggregates = [aggregate for aggregate in aggregates if aggregate]
+        if len(aggregates) < 2:
+            return aggregates[0] if aggregates else {}
+
+        merged, days = {"articles": 0, "days": [], "scores": {}, "topics": {}}, {}
+        for aggregate in aggregates:
+            merged["articles"] += aggregate["articles"]
+
+            for day, count in aggregate["days"]:
+                days[day] = days.get(day, 0) + count
+
+            # Score means are weighted by the number of scores in each index
+            for category, score in aggregate["scores"].items():
+                target = merged["scores"].setdefault(category, {"mean": None, "histogram": [0] * Aggregate.BINS})
+                target["mean"] = Aggregate.mean(target["mean"], sum(target["histogram"]), score["mean"], sum(score["histogram"]))
+                target["histogram"] = [x + y for x, y in zip(target["histogram"], score["histogram"])]
+
+            # Topic means are weighted by the number of topic articles in each index
+            for topic, stats in aggregate["topics"].items():
+                target = merged["topics"].setdefault(topic, {"articles": 0, "scores": {}})
+                for category, mean in stats["scores"].items():
+                    target["scores"][category] = Aggregate.mean(target["scores"].get(category), target["articles"], mean, stats["articles"])
+
+                target["articles"] += stats["articles"]
+
+        merged["days"] = [[day, days[day]] for day in sorted(days)]
+
+        return merged
+
+    @staticmethod
+    def mean(mean1, count1, mean2, count2):
+        """
+        Combines two means.
+
+        Args:
+            mean1: first mean, can be None
+            count1: number of values in first mean
+            mean2: second mean, can be None
+            count2: number of values in second mean
+
+        Returns:
+            combined mean
+        """
+
+        if mean1 is None or mean2 is None:
+            return mean2 if mean1 is None else mean1
+
+        return (mean1 * count1 + mean2 * count2) / (count1 + count2) if count1 + count2 else None
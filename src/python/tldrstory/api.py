@@ -2,48 +2,66 @@
 Backend model API
 """
 
-import os
-import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
 import txtai.api
 
+from .aggregate import Aggregate
+from .shard import Shard
+
 class API(txtai.api.API):
     """
     Extended API on top of txtai to return enriched query results.
     """
 
-    def find(self, cur, query, request):
+    def __init__(self, config):
         """
-        Executes query against embeddings index and/or SQLite, depending on the query.
+        Creates a new API instance.
 
         Args:
-            cur: open database cursor
-            query: query text
-            request: FastAPI request
+            config: api configuration
+        """
 
-        Returns:
-            query results
+        # Embeddings indexes are loaded by each shard
+        super().__init__({key: value for key, value in config.items() if key not in ("path", "shards")})
+        self.config = config
+
+        # Shards inherit top level settings. A single index path is a single shard, which also serves the txtai embeddings routes
+        # once its index is loaded.
+        settings = {key: value for key, value in config.items() if key != "shards"}
+        shards = config.get("shards", [{}])
+        callback = self.attach if len(shards) == 1 else None
+        self.shards = [Shard({**settings, **(shard if isinstance(shard, dict) else {"path": shard})}, callback) for shard in shards]
+
+        # Thread pool used to query shards in parallel
+        self.pool = ThreadPoolExecutor(len(self.shards)) if len(self.shards) > 1 else None
+
+        # Aggregate statistics endpoint
+        txtai.api.app.add_api_route("/aggregates", self.aggregates, methods=["GET"])
+
+    def attach(self, embeddings):
         """
+        Sets the embeddings index used by the txtai embeddings routes (similarity, transform, batchsearch and others).
 
-        if not query:
-            return cur.execute("SELECT id, 1.0 as score FROM articles ORDER BY date DESC LIMIT 100").fetchall()
+        Args:
+            embeddings: embeddings index
+        """
 
-        elif query.startswith("url:"):
-            query = query.replace("url:", "")
-            query = "%" + query + "%"
+        self.embeddings = embeddings
 
-            return cur.execute("SELECT id, 1.0 as score FROM articles WHERE reference like ? ORDER BY date DESC LIMIT 100", [query]).fetchall()
+    def aggregates(self):
+        """
+        Returns aggregate statistics over all articles, which are built at the end of each index run.
 
-        elif "topic" in request.query_params and request.query_params["topic"] == "1":
-            return cur.execute("SELECT id, 1.0 as score FROM articles a WHERE " +
-                               "(SELECT value FROM labels WHERE article=a.id AND category = 'topic' AND name=?) >= 0.5 " +
-                               "ORDER BY date DESC LIMIT 100", [query]).fetchall()
+        Returns:
+            aggregate statistics
+        """
 
-        return [(row["id"], row["score"]) for row in super().search(query, request)]
+        return Aggregate.merge([shard.aggregates() for shard in self.shards])
 
     def search(self, query, request):
         """
-        Extends txtai API to enrich results with content.
+        Extends txtai API to enrich results with content. Queries are run against each shard in parallel and results are merged.
 
         Args:
             query: query text
@@ -53,45 +71,15 @@ class API(txtai.api.API):
             query results
         """
 
-        results, filters = [], []
-
-        # Unpack filters
-        if "filters" in request.query_params:
-            filters = request.query_params["filters"].split(":")
-
-        database = sqlite3.connect(os.path.join(self.config["path"], "articles.db"))
-        cur = database.cursor()
-
-        # Pull results
-        for uid, score in self.find(cur, query if query != "Latest" else None, request):
-            if score >= 0.3:
-                # Statement parameters
-                params = []
-
-                # Build sql statement
-                sql = "SELECT date, title, reference"
-
-                # Build slider select sql
-                for name in filters:
-                    sql += ", (SELECT value FROM labels WHERE article=? AND category=? AND name=?) AS %s" % name
-                    params.extend([uid, name, name])
-
-                sql += " FROM articles WHERE id = ?"
-                params.append(uid)
-
-                # Add slider range filters
-                for name in filters:
-                    # Get current range from request
-                    current = [float(x) for x in request.query_params[name].split(":")]
-
-                    sql += " AND %s >= ? AND %s <= ?" % (name, name)
-                    params.extend(current)
+        if not self.pool:
+            return [result for _, result in self.shards[0].search(query, request)]
 
-                # Run statement
-                cur.execute(sql, params)
+        results = [result for results in self.pool.map(lambda shard: shard.search(query, request), self.shards) for result in results]
 
-                result = cur.fetchone()
-                if result:
-                    results.append(result)
+        # Merge by score for similarity queries, otherwise by date
+        if Shard.ranked(query, request):
+            results = sorted(results, key=lambda x: x[0], reverse=True)[:int(request.query_params.get("limit", 10))]
+        else:
+            results = sorted(results, key=lambda x: str(x[1][0]), reverse=True)[:100]
 
-        return results
+        return [result for _, result in results]
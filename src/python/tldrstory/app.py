@@ -100,13 +100,15 @@ class Components(object):
         return filters
 
     @staticmethod
-    def chart(df, layout):
+    def chart(df, layout, stats=None):
         """
-        Renders a summary chart.
+        Renders a summary chart. Plots the distribution of the x-axis label over all articles when statistics are available, otherwise
+        plots the query results.
 
         Args:
             df: dataframe
             layout: layout configuration
+            stats: statistics over all articles matching the current query, if available
         """
 
         if "chart" in layout:
@@ -116,6 +118,22 @@ class Components(object):
             scale = alt.Scale(domain=config["scale"], range=config["colors"])
 
             st.header(config["name"])
+
+            histogram = stats.get("histograms", {}).get(config["x"].lower()) if stats else None
+            if histogram and any(histogram):
+                # Bin centers on the 0 - 10 slider scale
+                bins = pd.DataFrame({config["x"]: [(x + 0.5) * 10 / len(histogram) for x in range(len(histogram))], "Articles": histogram})
+
+                st.altair_chart(
+                    alt.Chart(bins).mark_bar(size=20)
+                                   .encode(x=alt.X(config["x"], scale=alt.Scale(domain=[0, 10]), axis=alt.Axis(labels=False, ticks=False)),
+                                           y=alt.Y("Articles"),
+                                           color=alt.Color(config["x"], scale=scale, legend=None))
+                                   .configure_axis(grid=False).configure_view(strokeOpacity=0), use_container_width=True
+                )
+
+                return
+
             st.altair_chart(
                 alt.Chart(df).mark_circle(size=90)
                              .encode(x=alt.X(config["x"], scale=alt.Scale(domain=[0, 10]), axis=alt.Axis(labels=False, ticks=False)),
@@ -125,29 +143,34 @@ class Components(object):
             )
 
     @staticmethod
-    def summary(df, layout):
+    def summary(df, layout, stats=None):
         """
-        Renders a summary block.
+        Renders a summary block. Uses statistics over all articles when available, otherwise statistics are calculated
+        from the query results.
 
         Args:
             df: dataframe
             layout: layout configuration
+            stats: statistics over all articles matching the current query, if available
         """
 
         summary = []
 
         for column, config in layout["table"].items():
-            mean = df[column].mean()
+            if stats and stats["scores"].get(column.lower()) is not None:
+                mean = stats["scores"][column.lower()] * 10
+            else:
+                mean = df[column].mean()
             if config:
                 # Apply style to summary section
                 summary.append("%s: %s" % (column, Components.style(config, mean)))
 
                 # Apply style to column
-                df[column] = df.apply(lambda x: Components.style(config, x[column]), axis=1)
+                df[column] = Components.styles(config, df[column])
             else:
                 summary.append("%s: ```%.1f```" % (column, mean))
 
-        summary.append("Articles: " + "```%d```" % len(df))
+        summary.append("Articles: " + "```%d```" % (stats["articles"] if stats else len(df)))
 
         # Summary
         st.markdown(" ".join(summary), unsafe_allow_html=True)
@@ -166,7 +189,7 @@ class Components(object):
     @staticmethod
     def link(url, name):
         """
-        Renders a hyperlink.
+        Renders a hyperlink. Accepts either single values or pandas Series, which builds a hyperlink per row.
 
         Args:
             url: url
@@ -176,7 +199,7 @@ class Components(object):
             hyperlink text
         """
 
-        return '<a href="{}" rel="noopener noreferrer" target="_blank">{}</a>'.format(url, name)
+        return '<a href="' + url + '" rel="noopener noreferrer" target="_blank">' + name + '</a>'
 
     @staticmethod
     def style(config, value):
@@ -197,6 +220,27 @@ class Components(object):
 
         return None
 
+    @staticmethod
+    def styles(config, values):
+        """
+        Renders a style span for each value in a pandas Series.
+
+        Args:
+            config: style configuration
+            values: input values
+
+        Returns:
+            styled results
+        """
+
+        styled = pd.Series(None, index=values.index, dtype=object)
+
+        # Apply ranges in reverse order, the first matching range takes precedence
+        for low, high, name, style in reversed(config):
+            styled[values.between(low, high)] = '<span style="{}">{}</span>'.format(style, name)
+
+        return styled
+
 class App(object):
     """
     Streamlit application
@@ -233,11 +277,45 @@ class App(object):
 
         params = {"query": query, "limit": 100, "topic": topic, "filters": ":".join([name.lower() for name, _ in filters])}
 
+        # Collapse near-duplicate articles
+        if self.index["layout"].get("cluster"):
+            params["cluster"] = 1
+
         # Encode each filter value as additional parameters
         for name, value in filters:
             params[name.lower()] = ":".join([str(x) for x in value])
 
-        return requests.get(self.index["api"] + "/search", params=params).json()
+        return fetch(self.index["api"] + "/search", params)
+
+    def statistics(self, query, topic, filters):
+        """
+        Looks up statistics over all articles for a query. Statistics are available for the latest articles and pre-defined
+        topics when slider filters are not applied.
+
+        Args:
+            query: query to run
+            topic: flag that signals query is a pre-defined topic (1) or ad hoc query (0 or None)
+            filters: additional filters to apply
+
+        Returns:
+            statistics if available, None otherwise
+        """
+
+        if any(value != [0.0, 1.0] for _, value in filters):
+            return None
+
+        aggregates = fetch(self.index["api"] + "/aggregates", {})
+        if "articles" not in aggregates:
+            return None
+
+        if query == "Latest":
+            return {"articles": aggregates["articles"], "scores": {name: score["mean"] for name, score in aggregates["scores"].items()},
+                    "histograms": {name: score["histogram"] for name, score in aggregates["scores"].items()}}
+
+        if topic and query in aggregates["topics"]:
+            return aggregates["topics"][query]
+
+        return None
 
     def search(self, query, topic, filters):
         """
@@ -261,7 +339,7 @@ class App(object):
         # Format common fields
         df = pd.DataFrame(results, columns=columns)
         df["Date"] = pd.to_datetime(df["Date"]).dt.date
-        df["Title"] = df.apply(lambda x: Components.link(x["Reference"], x["Title"]), axis=1)
+        df["Title"] = Components.link(df["Reference"].fillna(""), df["Title"].fillna(""))
 
         return df.drop(columns=["Reference"])
 
@@ -293,17 +371,46 @@ class App(object):
 
         # Normalize slider ranges
         for name, _ in filters:
-            df[name] = df.apply(lambda x: x[name] * 10, axis=1).round(1)
+            df[name] = (df[name] * 10).round(1)
+
+        # Statistics over all articles, if available
+        stats = self.statistics(query, topic, filters)
 
         # Build summary chart
-        Components.chart(df, layout)
+        Components.chart(df, layout, stats)
 
         # Build summary details
-        Components.summary(df, layout)
+        Components.summary(df, layout, stats)
 
         # Table
         Components.table(df)
 
+@st.cache(allow_output_mutation=True)
+def session():
+    """
+    Creates and caches a HTTP session, which reuses pooled connections to the API.
+
+    Returns:
+        requests.Session
+    """
+
+    return requests.Session()
+
+@st.cache(ttl=60, max_entries=1000, show_spinner=False, allow_output_mutation=True)
+def fetch(url, params):
+    """
+    Runs a HTTP GET request. Responses are cached for a short time, reruns with the same parameters don't call the API.
+
+    Args:
+        url: request url
+        params: request parameters
+
+    Returns:
+        json response
+    """
+
+    return session().get(url, params=params).json()
+
 @st.cache
 def create(index):
     """
@@ -0,0 +1,225 @@
+"""
+Backfill module
+"""
+
+import csv
+import gzip
+import hashlib
+import json
+import logging
+
+from collections import namedtuple
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from .cache import Cache
+from .database.factory import DatabaseFactory
+from .filter import Filter
+from .pipeline import Pipeline
+from .source.source import Source
+
+class Backfill(object):
+    """
+    Imports historical article dumps. Dumps are read in chunks, de-duplicated against stored articles in memory, classified in batches and
+    inserted in bulk. Database indexes and the embeddings index are built once at the end.
+    """
+
+    # Accepted field names for each article field
+    FIELDS = {
+        "uid": ["uid", "id"],
+        "source": ["source"],
+        "date": ["date", "published"],
+        "title": ["title"],
+        "url": ["url", "reference", "link"],
+        "text": ["text"]
+    }
+
+    def __init__(self, index):
+        """
+        Creates a new backfill.
+
+        Args:
+            index: index configuration
+        """
+
+        self.index = index
+
+        # Article schema and entry date for all imported articles
+        source = Source(index)
+        self.article, self.entry = source.article, source.now()
+
+        # Dump record schema
+        self.record = namedtuple("Record", list(Backfill.FIELDS))
+
+    def __call__(self, paths, chunk=1000):
+        """
+        Imports a list of dumps.
+
+        Args:
+            paths: list of JSONL or CSV files, optionally gzip compressed
+            chunk: number of articles to process at a time
+        """
+
+        from txtai.pipeline import Labels
+
+        logging.info("Backfilling index: %s", self.index["name"])
+
+        # Text classifier and encoding cache
+        classifier = Labels()
+        cache = Cache(self.index["path"]) if self.index.get("encodings") else None
+
+        # Output database, indexes are created when loading is complete
+        database = DatabaseFactory.create(self.index)
+        database.defer()
+
+        # Ids and base urls of stored articles
+        seen = self.stored(database)
+        logging.info("Loaded %d stored ids and urls", len(seen))
+
+        # Compiled url ignore list
+        ignore = Filter(self.index.get("ignore"))
+
+        for path in paths:
+            logging.info("Reading %s", path)
+
+            for records in Pipeline.batches(self.read(path), chunk):
+                # Filter ignored links and articles already stored or seen earlier in the dumps
+                articles = self.accept(ignore(records), seen)
+
+                # Classify and store
+                labels = Pipeline.batchclassify(classifier, self.index, [article for article, _ in articles], cache)
+                database.savemany([(tuple(article) + (article.uid, text), label) for (article, text), label in zip(articles, labels)])
+
+        if cache:
+            cache.close()
+
+        # Build indexes
+        Pipeline.finalize(self.index, database)
+
+    def stored(self, database):
+        """
+        Loads the ids and base urls of stored articles.
+
+        Args:
+            database: database connection
+
+        Returns:
+            set of ids and base urls
+        """
+
+        seen = set()
+        for rows in database.stream("SELECT Id, Reference FROM articles", batch=10000):
+            for uid, url in rows:
+                seen.add(uid)
+                if url:
+                    seen.add(Pipeline.baseurl(url))
+
+        return seen
+
+    def accept(self, records, seen):
+        """
+        Removes records already stored or seen earlier in the dumps. Base urls are matched exactly.
+
+        Args:
+            records: list of records
+            seen: set of ids and base urls, updated with accepted articles
+
+        Returns:
+            list of (article, text)
+        """
+
+        articles = []
+        for record in records:
+            baseurl = Pipeline.baseurl(record.url)
+            if record.uid not in seen and baseurl not in seen:
+                seen.update([record.uid, baseurl])
+                articles.append((self.article(record.uid, record.source, record.date, record.title, record.url, self.entry), record.text))
+
+        return articles
+
+    def read(self, path):
+        """
+        Reads records from a dump file. Files ending with .csv (or .csv.gz) are read as CSV with a header row, all other files as JSONL.
+
+        Args:
+            path: input file
+
+        Returns:
+            generator of records
+        """
+
+        name = path[:-3] if path.endswith(".gz") else path
+        with (gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, "r", encoding="utf-8")) as f:
+            rows = csv.DictReader(f) if name.endswith(".csv") else (json.loads(line) for line in f if line.strip())
+
+            for row in rows:
+                record = self.parse(row)
+                if record:
+                    yield record
+
+    def parse(self, row):
+        """
+        Maps a dump row to a record.
+
+        Args:
+            row: dict of field values
+
+        Returns:
+            record, None if the row doesn't have a title and url or has a date that can't be parsed
+        """
+
+        row = {key.lower(): value for key, value in row.items() if key}
+
+        values = {}
+        for field, names in Backfill.FIELDS.items():
+            values[field] = next((row[name] for name in names if row.get(name)), None)
+
+        if not values["title"] or not values["url"]:
+            return None
+
+        # Store dates in the same format as other sources
+        if values["date"]:
+            values["date"] = self.date(values["date"])
+            if not values["date"]:
+                logging.debug("Skipping %s, invalid date", values["url"])
+                return None
+
+        # Generate uid as MD5 of title, same as RSS feeds
+        if not values["uid"]:
+            values["uid"] = hashlib.md5(values["title"].encode()).hexdigest()
+
+        return self.record(**{field: str(value) if value is not None else None for field, value in values.items()})
+
+    def date(self, value):
+        """
+        Parses an article date. Supports ISO 8601, RFC 2822 (RSS) and Unix timestamps. Dates with a time zone are converted to local
+        time, same as dates read from RSS feeds.
+
+        Args:
+            value: date value
+
+        Returns:
+            date formatted as YYYY-MM-DD HH:MM:SS, None if the date can't be parsed
+        """
+
+        value = str(value).strip()
+
+        date = None
+        try:
+            # Unix timestamp
+            date = datetime.fromtimestamp(float(value))
+        except (ValueError, OverflowError, OSError):
+            try:
+                # ISO 8601, Python < 3.11 doesn't accept a Z suffix
+                date = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+            except ValueError:
+                try:
+                    # RFC 2822
+                    date = parsedate_to_datetime(value)
+                except (TypeError, ValueError, IndexError):
+                    return None
+
+        if date.tzinfo:
+            date = date.astimezone().replace(tzinfo=None)
+
+        return date.strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,93 @@
+"""
+Batch module
+"""
+
+import logging
+import time
+
+from concurrent.futures import Future
+from queue import Empty, Queue
+from threading import Thread
+
+class Batcher(object):
+    """
+    Groups concurrent queries into batches that are run with a single call on a dedicated thread. Queries that arrive while a batch is
+    running are queued and run together as the next batch, which lets the model encode many queries at once.
+    """
+
+    def __init__(self, action, size=32, wait=0.0):
+        """
+        Creates a new batcher.
+
+        Args:
+            action: function that takes a list of queries and a limit and returns a list of results per query
+            size: maximum batch size
+            wait: maximum time in seconds to wait for additional queries before running a batch
+        """
+
+        self.action, self.size, self.wait = action, size, wait
+
+        # Pending queries
+        self.queue = Queue()
+
+        # Start processing thread
+        Thread(target=self.process, daemon=True).start()
+
+    def submit(self, query, limit):
+        """
+        Adds a query to the next batch.
+
+        Args:
+            query: query text
+            limit: maximum results
+
+        Returns:
+            Future with query results
+        """
+
+        future = Future()
+        self.queue.put((query, limit, future))
+
+        return future
+
+    def process(self):
+        """
+        Runs queued queries in batches.
+        """
+
+        while True:
+            batch = self.next()
+
+            try:
+                # Run batch using the largest limit, then truncate each result
+                results = self.action([query for query, _, _ in batch], max(limit for _, limit, _ in batch))
+
+                for (_, limit, future), result in zip(batch, results):
+                    future.set_result(result[:limit])
+
+            # pylint: disable=W0703
+            except Exception as ex:
+                logging.error(ex)
+                for _, _, future in batch:
+                    future.set_exception(ex)
+
+    def next(self):
+        """
+        Blocks until at least one query is queued, then collects up to size queries.
+
+        Returns:
+            list of (query, limit, future)
+        """
+
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.wait
+
+        while len(batch) < self.size:
+            try:
+                # Take queries already queued, waiting up to the deadline for more
+                timeout = deadline - time.monotonic()
+                batch.append(self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait())
+            except Empty:
+                break
+
+        return batch
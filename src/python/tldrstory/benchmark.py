@@ -0,0 +1,144 @@
+"""
+Benchmark module
+"""
+
+import logging
+import os
+import subprocess
+import sys
+
+import numpy as np
+import yaml
+
+from .database.factory import DatabaseFactory
+from .vectors import Vectors
+
+class Benchmark(object):
+    """
+    Methods to benchmark an index.
+    """
+
+    # Modules measured by the import benchmark
+    MODULES = ["tldrstory.index", "tldrstory.api", "tldrstory.source.rss", "tldrstory.source.reddit", "txtai.embeddings", "txtai.pipeline"]
+
+    @staticmethod
+    def exact(vectors, queries, limit, batch=10000):
+        """
+        Runs a brute force search over full precision vectors.
+
+        Args:
+            vectors: Vectors instance
+            queries: query vectors
+            limit: maximum results per query
+
+        Returns:
+            list of result id sets, one per query
+        """
+
+        scores = np.empty((len(queries), len(vectors.ids)), dtype=np.float32)
+
+        # Score in chunks to limit the number of vectors paged in at once
+        for x in range(0, len(vectors.ids), batch):
+            scores[:, x:x + batch] = queries @ vectors.vectors[x:x + batch].T
+
+        return [set(vectors.ids[x] for x in np.argsort(-row)[:limit]) for row in scores]
+
+    @staticmethod
+    def recall(index, samples=100, limit=10):
+        """
+        Measures recall of the embeddings index against an exact search along with the size of the index. Requires full precision
+        vectors, see the rescore embeddings setting.
+
+        Args:
+            index: index configuration
+            samples: number of stored titles to use as queries
+            limit: maximum results per query
+        """
+
+        from txtai.embeddings import Embeddings
+
+        path = index["path"]
+
+        # Load index and full precision vectors
+        embeddings = Embeddings()
+        embeddings.load(path)
+        vectors = Vectors(path)
+
+        # Sample stored titles as queries
+        database = DatabaseFactory.create(index, readonly=True)
+        queries = [row[0] for row in database.query("SELECT Title FROM articles ORDER BY RANDOM() LIMIT ?", [samples])]
+        database.close()
+
+        # Ground truth
+        embedded = np.array(embeddings.batchtransform([(None, query, None) for query in queries]), dtype=np.float32)
+        exact = Benchmark.exact(vectors, embedded, limit)
+
+        # Index results, with and without re-scoring
+        factor = embeddings.config.get("rescore", 5)
+        approximate, rescored = [], []
+        for x, query in enumerate(queries):
+            candidates = [uid for uid, _ in embeddings.search(query, limit * factor)]
+            approximate.append(set(candidates[:limit]))
+            rescored.append(set(uid for uid, _ in vectors.rescore(embedded[x], candidates, limit)))
+
+        logging.info("Queries: %d, limit: %d", len(queries), limit)
+        for name, results in [("index", approximate), ("rescored (%dx candidates)" % factor, rescored)]:
+            recall = np.mean([len(result & truth) / len(truth) for result, truth in zip(results, exact) if truth])
+            logging.info("Recall@%d %s: %.4f", limit, name, recall)
+
+        # Index storage vs full precision storage
+        size = os.path.getsize(os.path.join(path, "embeddings"))
+        full = vectors.vectors.nbytes
+        logging.info("Index size: %.1f MB, full precision vectors: %.1f MB (%.1f%%)", size / 1024 ** 2, full / 1024 ** 2, 100 * size / full)
+
+    @staticmethod
+    def imports(runs=5):
+        """
+        Measures module import times. Each import runs in a new interpreter, the fastest run is reported.
+
+        Args:
+            runs: number of runs per module
+        """
+
+        code = "import time; start = time.perf_counter(); import {0}; print(time.perf_counter() - start)"
+
+        for module in Benchmark.MODULES:
+            times = []
+            for _ in range(runs):
+                result = subprocess.run([sys.executable, "-c", code.format(module)], capture_output=True, text=True, check=False)
+                if result.returncode != 0:
+                    break
+
+                times.append(float(result.stdout.strip()))
+
+            if times:
+                logging.info("Import %s: %.3fs", module, min(times))
+            else:
+                logging.info("Import %s: failed", module)
+
+    @staticmethod
+    def run(index, samples=None):
+        """
+        Runs a benchmark.
+
+        Args:
+            index: path to index configuration, or "imports" to measure import times
+            samples: number of queries to run (defaults to 100), number of runs per module for import times (defaults to 5)
+        """
+
+        # Initialize logging
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(module)-10s: %(message)s")
+
+        if index == "imports":
+            Benchmark.imports(int(samples) if samples else 5)
+            return
+
+        # Load pipeline YAML file
+        with open(index, "r") as f:
+            # Read configuration
+            index = yaml.safe_load(f)
+
+        Benchmark.recall(index, int(samples) if samples else 100)
+
+if __name__ == "__main__":
+    Benchmark.run(*sys.argv[1:])
@@ -0,0 +1,145 @@
+"""
+Cache module
+"""
+
+import hashlib
+import os
+import sqlite3
+
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+
+class Cache(object):
+    """
+    Cache of model outputs (vectors and classifier scores) keyed by model id and a hash of the input text. Caches are either persisted
+    to a SQLite file, used by index runs to only encode unseen text, or held in memory with a maximum size, used by the API.
+    """
+
+    # Maximum number of parameters per query
+    CHUNK = 900
+
+    def __init__(self, path=None, size=1000):
+        """
+        Creates a new cache.
+
+        Args:
+            path: index path, cache is stored in memory if None
+            size: maximum number of entries for a memory cache
+        """
+
+        self.db, self.memory, self.size, self.lock = None, OrderedDict(), size, Lock()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+            self.db = sqlite3.connect(os.path.join(path, "encodings.db"), timeout=30.0)
+            self.db.execute("PRAGMA journal_mode = WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS encodings (Key TEXT PRIMARY KEY, Value BLOB)")
+            self.db.commit()
+
+    def __call__(self, model, texts, encode):
+        """
+        Gets outputs for a list of texts, running encode for texts not in the cache.
+
+        Args:
+            model: model id
+            texts: list of text
+            encode: function that returns a list of outputs for a list of text
+
+        Returns:
+            list of outputs, one per text
+        """
+
+        outputs = self.get(model, texts)
+
+        # Encode misses
+        missing = [x for x, output in enumerate(outputs) if output is None]
+        if missing:
+            encoded = encode([texts[x] for x in missing])
+            self.put(model, [texts[x] for x in missing], encoded)
+
+            for x, output in zip(missing, encoded):
+                outputs[x] = np.asarray(output, dtype=np.float32)
+
+        return outputs
+
+    def get(self, model, texts):
+        """
+        Looks up cached outputs.
+
+        Args:
+            model: model id
+            texts: list of text
+
+        Returns:
+            list of outputs, None for texts not in the cache
+        """
+
+        keys = [Cache.key(model, text) for text in texts]
+
+        if self.db:
+            values = {}
+            for x in range(0, len(keys), Cache.CHUNK):
+                chunk = keys[x:x + Cache.CHUNK]
+                values.update(self.db.execute("SELECT Key, Value FROM encodings WHERE Key IN (%s)" % ", ".join(["?"] * len(chunk)), chunk))
+
+            return [np.frombuffer(values[key], dtype=np.float32) if key in values else None for key in keys]
+
+        with self.lock:
+            outputs = []
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+
+                outputs.append(self.memory.get(key))
+
+            return outputs
+
+    def put(self, model, texts, outputs):
+        """
+        Stores outputs.
+
+        Args:
+            model: model id
+            texts: list of text
+            outputs: list of outputs, one per text
+        """
+
+        rows = [(Cache.key(model, text), np.asarray(output, dtype=np.float32)) for text, output in zip(texts, outputs)]
+
+        if self.db:
+            self.db.executemany("INSERT OR REPLACE INTO encodings (Key, Value) VALUES (?, ?)", [(key, output.tobytes()) for key, output in rows])
+            self.db.commit()
+        else:
+            with self.lock:
+                for key, output in rows:
+                    self.memory[key] = output
+                    self.memory.move_to_end(key)
+
+                while len(self.memory) > self.size:
+                    self.memory.popitem(last=False)
+
+    def close(self):
+        """
+        Closes the cache.
+        """
+
+        if self.db:
+            self.db.close()
+
+    @staticmethod
+    def key(model, text):
+        """
+        Builds a cache key.
+
+        Args:
+            model: model id
+            text: input text
+
+        Returns:
+            cache key
+        """
+
+        return hashlib.sha1(("%s\n%s" % (model, text)).encode()).hexdigest()
@@ -0,0 +1,115 @@
+"""
+Cluster module
+"""
+
+import random
+import re
+import zlib
+
+class Cluster(object):
+    """
+    Groups near-duplicate article titles. Candidate matches are found with MinHash signatures and locality sensitive hashing, then
+    verified with the token set Jaccard similarity.
+    """
+
+    # Mersenne prime used for hash permutations
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, config):
+        """
+        Creates a new cluster index.
+
+        Args:
+            config: cluster configuration
+        """
+
+        # Minimum Jaccard similarity for two titles to be considered near-duplicates
+        self.threshold = config.get("threshold", 0.6)
+
+        # Number of LSH bands and rows per band
+        self.bands, self.rows = config.get("bands", 16), config.get("rows", 4)
+
+        # Fixed seed, signatures must be consistent across runs
+        generator = random.Random(0)
+        self.permutations = [(generator.randint(1, Cluster.PRIME - 1), generator.randint(0, Cluster.PRIME - 1))
+                             for _ in range(self.bands * self.rows)]
+
+        # LSH buckets, token sets and cluster ids of indexed titles
+        self.buckets, self.tokens, self.clusters = {}, {}, {}
+
+    def search(self, title):
+        """
+        Finds the closest indexed near-duplicate of title.
+
+        Args:
+            title: article title
+
+        Returns:
+            (uid, cluster id) of best match if found, None otherwise
+        """
+
+        tokens = self.tokenize(title)
+        if not tokens:
+            return None
+
+        # Collect candidates sharing at least one LSH band
+        candidates = set()
+        for key in self.keys(tokens):
+            candidates.update(self.buckets.get(key, []))
+
+        # Verify candidates with exact similarity
+        best, match = self.threshold, None
+        for uid in candidates:
+            similarity = len(tokens & self.tokens[uid]) / len(tokens | self.tokens[uid])
+            if similarity >= best:
+                best, match = similarity, uid
+
+        return (match, self.clusters[match]) if match else None
+
+    def insert(self, uid, title, cluster):
+        """
+        Adds a title to the index.
+
+        Args:
+            uid: article id
+            title: article title
+            cluster: cluster id
+        """
+
+        tokens = self.tokenize(title)
+        if tokens:
+            for key in self.keys(tokens):
+                self.buckets.setdefault(key, []).append(uid)
+
+            self.tokens[uid] = tokens
+            self.clusters[uid] = cluster
+
+    def keys(self, tokens):
+        """
+        Builds LSH bucket keys for a token set.
+
+        Args:
+            tokens: token set
+
+        Returns:
+            list of bucket keys, one per band
+        """
+
+        # MinHash signature
+        hashes = [zlib.crc32(token.encode()) for token in tokens]
+        signature = [min((a * h + b) % Cluster.PRIME for h in hashes) for a, b in self.permutations]
+
+        return [(x, tuple(signature[x * self.rows:(x + 1) * self.rows])) for x in range(self.bands)]
+
+    def tokenize(self, title):
+        """
+        Splits a title into a set of lower cased word tokens.
+
+        Args:
+            title: article title
+
+        Returns:
+            token set
+        """
+
+        return set(re.findall(r"\w+", title.lower())) if title else set()
@@ -0,0 +1,180 @@
+"""
+Coordinator module
+"""
+
+import logging
+import os
+import time
+
+from .database.factory import DatabaseFactory
+from .filter import Filter
+from .pipeline import Pipeline
+from .source.factory import Factory
+from .source.source import Source
+from .workqueue import WorkQueue
+
+class Coordinator(object):
+    """
+    Runs an index run with fetch and classify work distributed to queue workers. The coordinator splits the data source into units of work,
+    filters fetched articles and is the single writer of the articles database.
+    """
+
+    def __init__(self, index):
+        """
+        Creates a new coordinator.
+
+        Args:
+            index: index configuration
+        """
+
+        self.index = index
+        self.config = index.get("queue", {})
+
+        # Work queue stored in the index path
+        os.makedirs(index["path"], exist_ok=True)
+        self.queue = WorkQueue(os.path.join(index["path"], "queue.db"))
+
+        # Article schema
+        self.article = Source(index).article
+
+        # Output database
+        self.database = None
+
+        # Near-duplicate cluster index and compiled url ignore list
+        self.cluster, self.ignore = None, Filter(index.get("ignore"))
+
+        # Ids and base urls accepted in this run, labels of articles processed in this run
+        self.seen, self.processed = set(), {}
+
+        # Near-duplicates waiting on labels of an article queued for classification, keyed by queued article id
+        self.waiting = {}
+
+    def __call__(self):
+        """
+        Runs the index run.
+        """
+
+        logging.info("Coordinating index run: %s", self.index["name"])
+
+        self.database = DatabaseFactory.create(self.index)
+        self.cluster = Pipeline.cluster(self.index, self.database) if "cluster" in self.index else None
+
+        # Remove tasks left by a previous run, then queue a fetch task per source unit
+        self.queue.clear()
+        units = Factory.create(self.index).units()
+        for unit in units:
+            self.queue.put("fetch", unit)
+
+        logging.info("Queued %d fetch tasks", len(units))
+
+        poll, timeout = self.config.get("poll", 1.0), self.config.get("timeout", 600)
+
+        # Process results until all tasks are complete
+        while True:
+            results = self.queue.results()
+            for name, data, result in results:
+                if result is None:
+                    logging.error("%s task failed after retries", name)
+                    self.release(data if name == "classify" else [])
+                elif name == "fetch":
+                    self.fetched(result)
+                else:
+                    self.classified(data, result)
+
+            if not results:
+                if not self.queue.count():
+                    break
+
+                # Reassign tasks from workers that stopped
+                self.queue.requeue(timeout)
+                time.sleep(poll)
+
+        self.queue.close()
+
+        # Build indexes
+        Pipeline.finalize(self.index, self.database)
+
+    def fetched(self, articles):
+        """
+        Filters fetched articles and queues new articles for classification. Near-duplicates of previously processed articles
+        reuse labels and are saved directly.
+
+        Args:
+            articles: list of fetched articles
+        """
+
+        batch = []
+        for chunk in Pipeline.batches(self.article(*article) for article in articles):
+            # Only process recent external link posts
+            for article in Pipeline.accept(self.database, chunk, self.ignore, self.seen):
+                # Find near-duplicate of a previously processed article
+                match = self.cluster.search(article.title) if self.cluster else None
+
+                if match and match[0] in self.waiting:
+                    # Near-duplicate of a queued article, save once labels are available
+                    uid, cid = match
+                    self.waiting[uid].append((article, cid, uid))
+                    self.waiting[article.uid] = self.waiting[uid]
+                elif match:
+                    # Reuse labels of near-duplicate article
+                    uid, cid = match
+                    self.save(article, cid, Pipeline.copy(self.database, uid, article, self.processed), None)
+                else:
+                    # Queue for classification
+                    cid = article.uid
+                    self.waiting[article.uid] = []
+                    batch.append(article)
+
+                if self.cluster:
+                    self.cluster.insert(article.uid, article.title, cid)
+
+        # Queue classify tasks
+        size = self.config.get("batch", 32)
+        for x in range(0, len(batch), size):
+            self.queue.put("classify", [list(article) for article in batch[x:x + size]])
+
+    def classified(self, articles, results):
+        """
+        Saves classified articles along with near-duplicates waiting on labels.
+
+        Args:
+            articles: list of classified articles
+            results: list of (labels, text), one per article
+        """
+
+        for article, (labels, text) in zip(articles, results):
+            article = self.article(*article)
+            self.save(article, article.uid, [tuple(label) for label in labels], text)
+
+            # Save near-duplicates
+            for duplicate, cid, uid in self.waiting.pop(article.uid, []):
+                self.waiting.pop(duplicate.uid, None)
+                self.save(duplicate, cid, Pipeline.copy(self.database, uid, duplicate, self.processed), None)
+
+    def release(self, articles):
+        """
+        Removes articles and their near-duplicates from the waiting list, used when classification fails.
+
+        Args:
+            articles: list of articles
+        """
+
+        for article in articles:
+            for duplicate, _, _ in self.waiting.pop(article[0], []):
+                self.waiting.pop(duplicate.uid, None)
+
+    def save(self, article, cid, labels, text):
+        """
+        Saves an article.
+
+        Args:
+            article: article object
+            cid: cluster id
+            labels: list of labels
+            text: extracted article text
+        """
+
+        if self.cluster:
+            self.processed[article.uid] = labels
+
+        self.database.save((tuple(article) + (cid, text), labels))
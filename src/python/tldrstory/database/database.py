@@ -0,0 +1,102 @@
+"""
+Database module
+"""
+
+class Database(object):
+    """
+    Defines data structures and methods to store and query article content.
+
+    Databases are opened either as a writer, used by the indexing process, or as a read-only reader, used by the API and other
+    processes that read content while indexing runs. Queries are written with "?" parameter markers.
+    """
+
+    # Articles column that increases as articles are inserted
+    SEQUENCE = None
+
+    def save(self, article):
+        """
+        Saves an article.
+
+        Args:
+            article: article metadata and text content
+        """
+
+    def savemany(self, articles):
+        """
+        Saves a batch of articles.
+
+        Args:
+            articles: list of article metadata and text content
+        """
+
+        for article in articles:
+            self.save(article)
+
+    def defer(self):
+        """
+        Drops secondary indexes ahead of a bulk load. Indexes are created again when processing is complete.
+        """
+
+    def complete(self):
+        """
+        Signals processing is complete and runs final storage methods.
+        """
+
+    def close(self):
+        """
+        Commits and closes the database.
+        """
+
+    def query(self, sql, parameters=None):
+        """
+        Runs a query and returns all rows.
+
+        Args:
+            sql: SQL statement
+            parameters: statement parameters
+
+        Returns:
+            list of rows
+        """
+
+        return []
+
+    def stream(self, sql, parameters=None, batch=1000):
+        """
+        Runs a query and returns rows in chunks, without loading all rows into memory.
+
+        Args:
+            sql: SQL statement
+            parameters: statement parameters
+            batch: number of rows per chunk
+
+        Returns:
+            generator of row lists
+        """
+
+        yield from []
+
+    def keyword(self, query, limit):
+        """
+        Runs a ranked keyword query against article titles.
+
+        Args:
+            query: query text
+            limit: maximum results
+
+        Returns:
+            list of (id, score) sorted by score
+        """
+
+        return []
+
+    def overlap(self):
+        """
+        Number of sequence values below the highest committed sequence that may still be committed by concurrent writers. Incremental
+        readers re-read this window to pick up late commits.
+
+        Returns:
+            number of sequence values
+        """
+
+        return 0
@@ -0,0 +1,31 @@
+"""
+Factory module
+"""
+
+class DatabaseFactory(object):
+    """
+    Factory methods for creating databases.
+    """
+
+    @staticmethod
+    def create(config, readonly=False):
+        """
+        Creates a new database instance.
+
+        Args:
+            config: index or api configuration
+            readonly: if True, the database is opened for reading
+
+        Returns:
+            database object
+        """
+
+        # Databases are imported when selected
+        if "postgres" in config:
+            # PostgreSQL server database
+            from .postgres import Postgres
+            return Postgres(config, readonly)
+
+        # SQLite database file stored in the index path
+        from .sqlite import SQLite
+        return SQLite(config, readonly)
@@ -0,0 +1,279 @@
+"""
+PostgreSQL module
+"""
+
+import csv
+import io
+import logging
+import threading
+
+# Conditional import
+try:
+    from psycopg2.pool import ThreadedConnectionPool
+
+    POSTGRES = True
+except ImportError:
+    POSTGRES = False
+
+from .database import Database
+
+class Postgres(Database):
+    """
+    Defines data structures and methods to store article content in PostgreSQL. Articles are buffered and written in bulk using COPY.
+    Connections are pooled, which allows multiple API threads to query concurrently.
+    """
+
+    # Articles schema
+    ARTICLES = {
+        "Id": "TEXT PRIMARY KEY",
+        "Source": "TEXT",
+        "Date": "TIMESTAMP",
+        "Title": "TEXT",
+        "Reference": "TEXT",
+        "Entry": "TIMESTAMP",
+        "Cluster": "TEXT",
+        "Text": "TEXT"
+    }
+
+    # Labels schema
+    LABELS = {
+        "Id": "BIGSERIAL PRIMARY KEY",
+        "Article": "TEXT",
+        "Category": "TEXT",
+        "Name": "TEXT",
+        "Value": "DOUBLE PRECISION"
+    }
+
+    # Articles column that increases as articles are inserted. Concurrent writers can commit lower values late, see overlap.
+    SEQUENCE = "Seq"
+
+    # SQL statements
+    CREATE_TABLE = "CREATE TABLE IF NOT EXISTS {table} ({fields})"
+    ADD_COLUMN = "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {field}"
+    CREATE_STAGE = "CREATE TEMP TABLE {table}_stage (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    CREATE_INDEXES = [
+        "CREATE INDEX IF NOT EXISTS labels_article ON labels(Article)",
+        "CREATE INDEX IF NOT EXISTS articles_title ON articles USING GIN (to_tsvector('english', Title))"
+    ]
+    DROP_INDEXES = ["DROP INDEX IF EXISTS labels_article", "DROP INDEX IF EXISTS articles_title"]
+
+    def __init__(self, config, readonly=False):
+        """
+        Connects to a PostgreSQL database.
+
+        Args:
+            config: index configuration, connection settings are read from the postgres section
+            readonly: if True, the database is opened for reading
+        """
+
+        if not POSTGRES:
+            raise ImportError('PostgreSQL is not available - install "postgres" extra to enable')
+
+        settings = config["postgres"]
+
+        # Connection pool. The pool raises an error when exhausted, readers wait for a free connection.
+        size = settings.get("pool", 8)
+        self.pool = ThreadedConnectionPool(1, size, settings["url"])
+        self.available = threading.BoundedSemaphore(size)
+
+        # Sequence window re-read by incremental exports, covers rows committed late by concurrent writers
+        self.window = settings.get("overlap", 10000)
+
+        self.readonly = readonly
+        if readonly:
+            return
+
+        # Index fields
+        self.aindex = 0
+
+        # Number of articles buffered per bulk insert
+        self.batch = settings.get("batch", 1000)
+        self.articles, self.labels = [], []
+
+        # Writer connection
+        self.db = self.pool.getconn()
+        self.cur = self.db.cursor()
+
+        # Create tables
+        for name, table in [("articles", Postgres.ARTICLES), ("labels", Postgres.LABELS)]:
+            columns = ["{0} {1}".format(column, ctype) for column, ctype in table.items()]
+            self.cur.execute(Postgres.CREATE_TABLE.format(table=name, fields=", ".join(columns)))
+
+            # Add columns missing from tables created by earlier versions
+            for column in columns[1:]:
+                self.cur.execute(Postgres.ADD_COLUMN.format(table=name, field=column))
+
+            # Insert sequence, filled by default
+            if name == "articles":
+                self.cur.execute(Postgres.ADD_COLUMN.format(table=name, field="%s BIGSERIAL" % Postgres.SEQUENCE))
+
+            # Staging table for bulk inserts
+            self.cur.execute(Postgres.CREATE_STAGE.format(table=name))
+
+        self.db.commit()
+
+    def save(self, article):
+        # Unpack data
+        article, labels = article
+
+        self.articles.append(article)
+        self.labels.extend(labels)
+
+        # Increment number of articles processed
+        self.aindex += 1
+        if self.aindex % self.batch == 0:
+            logging.info("Inserted %d articles", self.aindex)
+
+            # Write buffered articles
+            self.flush()
+
+    def defer(self):
+        for index in Postgres.DROP_INDEXES:
+            self.cur.execute(index)
+
+        self.db.commit()
+
+    def complete(self):
+        self.flush()
+
+        logging.info("Total articles inserted: %d", self.aindex)
+
+        # Create indexes
+        for index in Postgres.CREATE_INDEXES:
+            self.cur.execute(index)
+
+        self.db.commit()
+
+    def close(self):
+        if not self.readonly:
+            self.db.commit()
+            self.pool.putconn(self.db)
+
+        self.pool.closeall()
+
+    def query(self, sql, parameters=None):
+        connection = self.connection()
+
+        try:
+            with connection.cursor() as cur:
+                cur.execute(self.sql(sql), parameters)
+                return cur.fetchall()
+        finally:
+            self.release(connection)
+
+    def stream(self, sql, parameters=None, batch=1000):
+        connection = self.connection()
+
+        try:
+            # Server-side cursor, rows are sent to the client in chunks
+            with connection.cursor(name="stream") as cur:
+                cur.itersize = batch
+                cur.execute(self.sql(sql), parameters)
+
+                rows = cur.fetchmany(batch)
+                while rows:
+                    yield rows
+                    rows = cur.fetchmany(batch)
+        finally:
+            self.release(connection)
+
+    def keyword(self, query, limit):
+        # Match any of the query terms
+        return self.query("SELECT Id, ts_rank_cd(to_tsvector('english', Title), q) AS score FROM articles, " +
+                          "CAST(replace(CAST(plainto_tsquery('english', ?) AS TEXT), '&', '|') AS tsquery) q " +
+                          "WHERE to_tsvector('english', Title) @@ q ORDER BY score DESC LIMIT ?", [query, limit])
+
+    def flush(self):
+        """
+        Writes buffered articles and labels. Rows are copied into staging tables, then inserted skipping articles that already exist.
+        """
+
+        if not self.articles:
+            return
+
+        # Bulk copy into staging tables
+        self.copy("articles_stage", list(Postgres.ARTICLES), self.articles)
+        self.copy("labels_stage", list(Postgres.LABELS)[1:], [label[1:] for label in self.labels])
+
+        # Insert new articles, then labels for the inserted articles
+        columns = ", ".join(Postgres.ARTICLES)
+        self.cur.execute("INSERT INTO articles ({0}) SELECT DISTINCT ON (Id) {0} FROM articles_stage ".format(columns) +
+                         "ON CONFLICT (Id) DO NOTHING RETURNING Id")
+        inserted = [row[0] for row in self.cur.fetchall()]
+
+        columns = ", ".join(list(Postgres.LABELS)[1:])
+        self.cur.execute("INSERT INTO labels ({0}) SELECT {0} FROM labels_stage WHERE Article = ANY(%s)".format(columns), [inserted])
+
+        # Commit clears staging tables
+        self.db.commit()
+
+        self.articles, self.labels = [], []
+
+    def copy(self, table, columns, rows):
+        """
+        Bulk loads rows into a table using COPY.
+
+        Args:
+            table: table name
+            columns: column names
+            rows: list of rows
+        """
+
+        data = io.StringIO()
+        writer = csv.writer(data)
+        for row in rows:
+            # Empty text values are stored as NULL
+            writer.writerow(["" if value is None or (isinstance(value, str) and not value.strip()) else value for value in row])
+
+        data.seek(0)
+        self.cur.copy_expert("COPY %s (%s) FROM STDIN WITH (FORMAT CSV)" % (table, ", ".join(columns)), data)
+
+    def overlap(self):
+        return self.window
+
+    def connection(self):
+        """
+        Gets a connection. Writers use a single connection, readers take a connection from the pool and block while the pool is exhausted.
+
+        Returns:
+            connection
+        """
+
+        if not self.readonly:
+            return self.db
+
+        self.available.acquire()
+        try:
+            return self.pool.getconn()
+        except Exception:
+            self.available.release()
+            raise
+
+    def release(self, connection):
+        """
+        Releases a connection returned by the connection method.
+
+        Args:
+            connection: connection
+        """
+
+        if self.readonly:
+            # End read transaction and return connection to the pool
+            try:
+                connection.rollback()
+                self.pool.putconn(connection)
+            finally:
+                self.available.release()
+
+    def sql(self, sql):
+        """
+        Converts "?" parameter markers to the psycopg2 format.
+
+        Args:
+            sql: SQL statement
+
+        Returns:
+            converted SQL statement
+        """
+
+        return sql.replace("%", "%%").replace("?", "%s")
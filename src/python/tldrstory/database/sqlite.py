@@ -0,0 +1,309 @@
+"""
+SQLite module
+"""
+
+import os
+import logging
+import sqlite3
+
+from threading import local
+
+from .database import Database
+
+class SQLite(Database):
+    """
+    Defines data structures and methods to store article content in SQLite.
+    """
+
+    # Articles schema
+    ARTICLES = {
+        "Id": "TEXT PRIMARY KEY",
+        "Source": "TEXT",
+        "Date": "DATETIME",
+        "Title": "TEXT",
+        "Reference": "TEXT",
+        "Entry": "DATETIME",
+        "Cluster": "TEXT",
+        "Text": "TEXT"
+    }
+
+    # Labels schema
+    LABELS = {
+        "Id": "INTEGER PRIMARY KEY",
+        "Article": "TEXT",
+        "Category": "TEXT",
+        "Name": "TEXT",
+        "Value": "REAL"
+    }
+
+    # SQL statements
+    CREATE_TABLE = "CREATE TABLE IF NOT EXISTS {table} ({fields})"
+    ADD_COLUMN = "ALTER TABLE {table} ADD COLUMN {field}"
+    INSERT_ROW = "INSERT INTO {table} ({columns}) VALUES ({values})"
+    CREATE_INDEX = "CREATE INDEX IF NOT EXISTS labels_article ON labels(article)"
+    DROP_INDEX = "DROP INDEX IF EXISTS labels_article"
+
+    # Full text index over article titles, used for keyword queries. New articles are added by an insert trigger.
+    CREATE_FTS = "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(Title, content='articles')"
+    CREATE_FTS_TRIGGER = "CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN " + \
+                         "INSERT INTO articles_fts(rowid, Title) VALUES (new.rowid, new.Title); END"
+    REBUILD_FTS = "INSERT INTO articles_fts(articles_fts) VALUES('rebuild')"
+
+    # SQLite allows a single writer at a time, rowids increase in commit order
+    SEQUENCE = "rowid"
+
+    # Default connection settings. Write-ahead logging allows readers to run concurrently with the indexer.
+    PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "temp_store": "MEMORY"
+    }
+
+    def __init__(self, config, readonly=False):
+        """
+        Creates and initializes a SQLite database.
+
+        Args:
+            config: index configuration, the database is stored in the index path. Optional SQLite settings are read from the sqlite
+                    section, which supports any pragma along with the number of articles per transaction (batch).
+            readonly: if True, the database is opened for reading. Each thread uses a separate read-only connection.
+        """
+
+        # Output database file
+        self.dbfile = os.path.join(config["path"], "articles.db")
+
+        # Reader connections
+        self.readonly, self.local = readonly, local()
+        if readonly:
+            return
+
+        # Create if output path doesn't exist
+        os.makedirs(config["path"], exist_ok=True)
+
+        # Index fields
+        self.aindex = 0
+
+        # Create output database
+        self.db = sqlite3.connect(self.dbfile)
+
+        # Create database cursor
+        self.cur = self.db.cursor()
+
+        # Apply connection settings
+        self.pragmas(config.get("sqlite"))
+
+        # Create articles table
+        self.create(SQLite.ARTICLES, "articles")
+
+        # Create labels table
+        self.create(SQLite.LABELS, "labels")
+
+        # Create full text index, databases without the insert trigger index existing articles once
+        trigger = self.cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'articles_fts_insert'").fetchone()
+        self.execute(SQLite.CREATE_FTS)
+        self.execute(SQLite.CREATE_FTS_TRIGGER)
+        if not trigger:
+            self.execute(SQLite.REBUILD_FTS)
+            self.db.commit()
+
+        # Start transaction
+        self.cur.execute("BEGIN")
+
+    def save(self, article):
+        # Unpack data
+        article, labels = article
+
+        # Article
+        self.insert(SQLite.ARTICLES, "articles", article)
+
+        # Labels
+        for label in labels:
+            self.insert(SQLite.LABELS, "labels", label)
+
+        # Increment number of articles processed
+        self.aindex += 1
+        if self.aindex % self.batch == 0:
+            logging.info("Inserted %d articles", self.aindex)
+
+            # Commit current transaction and start a new one
+            self.transaction()
+
+    def savemany(self, articles):
+        # Bulk insert articles and labels
+        for table, name, rows in [(SQLite.ARTICLES, "articles", [article for article, _ in articles]),
+                                  (SQLite.LABELS, "labels", [label for _, labels in articles for label in labels])]:
+            columns = list(table)
+            insert = SQLite.INSERT_ROW.format(table=name, columns=", ".join(columns), values=", ".join(["?"] * len(columns)))
+            self.cur.executemany(insert, [self.values(table, row, columns) for row in rows])
+
+        self.aindex += len(articles)
+        logging.info("Inserted %d articles", self.aindex)
+
+        # Commit current transaction and start a new one
+        self.transaction()
+
+    def defer(self):
+        self.execute(SQLite.DROP_INDEX)
+
+    def complete(self):
+        logging.info("Total articles inserted: %d", self.aindex)
+
+        # Create articles index for sections table
+        self.execute(SQLite.CREATE_INDEX)
+
+        # Commit and checkpoint write-ahead log into the main database file
+        self.db.commit()
+        self.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.execute("BEGIN")
+
+    def close(self):
+        if not self.readonly:
+            self.db.commit()
+            self.db.close()
+
+    def query(self, sql, parameters=None):
+        return self.connection().execute(sql, parameters if parameters else []).fetchall()
+
+    def stream(self, sql, parameters=None, batch=1000):
+        cur = self.connection().cursor()
+        cur.execute(sql, parameters if parameters else [])
+
+        rows = cur.fetchmany(batch)
+        while rows:
+            yield rows
+            rows = cur.fetchmany(batch)
+
+    def keyword(self, query, limit):
+        # Match any of the query terms, quote terms to escape full text query syntax
+        terms = " OR ".join(['"%s"' % term.replace('"', '""') for term in query.split()])
+        if not terms:
+            return []
+
+        return self.query("SELECT a.Id, -bm25(articles_fts) AS score FROM articles_fts JOIN articles a ON a.rowid = articles_fts.rowid " +
+                          "WHERE articles_fts MATCH ? ORDER BY bm25(articles_fts) LIMIT ?", [terms, limit])
+
+    def connection(self):
+        """
+        Gets the database connection for the current thread.
+
+        Returns:
+            connection
+        """
+
+        if not self.readonly:
+            return self.db
+
+        if not hasattr(self.local, "db"):
+            self.local.db = sqlite3.connect("file:%s?mode=ro" % self.dbfile, uri=True)
+
+        return self.local.db
+
+    def pragmas(self, config):
+        """
+        Applies connection settings.
+
+        Args:
+            config: SQLite settings
+        """
+
+        settings = {**SQLite.PRAGMAS, **(config if config else {})}
+
+        # Number of articles inserted per transaction
+        self.batch = settings.pop("batch", 1000)
+
+        # Page size only applies to new databases and must be set first
+        for name in sorted(settings, key=lambda x: x != "page_size"):
+            self.execute("PRAGMA %s = %s" % (name, settings[name]))
+
+    def transaction(self):
+        """
+        Commits current transaction and creates a new one.
+        """
+
+        self.db.commit()
+        self.cur.execute("BEGIN")
+
+    def create(self, table, name):
+        """
+        Creates a SQLite table.
+
+        Args:
+            table: table schema
+            name: table name
+        """
+
+        columns = ["{0} {1}".format(name, ctype) for name, ctype in table.items()]
+        create = SQLite.CREATE_TABLE.format(table=name, fields=", ".join(columns))
+
+        # pylint: disable=W0703
+        try:
+            self.cur.execute(create)
+
+            # Add columns missing from tables created by earlier versions
+            existing = [row[1].lower() for row in self.cur.execute("PRAGMA table_info(%s)" % name).fetchall()]
+            for column in [column for column in columns if column.split()[0].lower() not in existing]:
+                self.cur.execute(SQLite.ADD_COLUMN.format(table=name, field=column))
+        except Exception as e:
+            logging.error(create)
+            logging.error(e)
+
+    def execute(self, sql):
+        """
+        Executes SQL statement against open cursor.
+
+        Args:
+            sql: SQL statement
+        """
+
+        self.cur.execute(sql)
+
+    def insert(self, table, name, row):
+        """
+        Builds and inserts a row.
+
+        Args:
+            table: table object
+            name: table name
+            row: row to insert
+        """
+
+        # Build insert prepared statement
+        columns = [name for name, _ in table.items()]
+        insert = SQLite.INSERT_ROW.format(table=name,
+                                          columns=", ".join(columns),
+                                          values=("?, " * len(columns))[:-2])
+
+        try:
+            # Execute insert statement
+            self.cur.execute(insert, self.values(table, row, columns))
+        # pylint: disable=W0703
+        except Exception as ex:
+            logging.error("Error inserting row: %s", row)
+            logging.error(ex)
+
+    def values(self, table, row, columns):
+        """
+        Formats and converts row into database types based on table schema.
+
+        Args:
+            table: table schema
+            row: row tuple
+            columns: column names
+
+        Returns:
+            Database schema formatted row tuple
+        """
+
+        values = []
+        for x, column in enumerate(columns):
+            # Get value
+            value = row[x]
+
+            if table[column].startswith("TEXT"):
+                # Clean empty text and replace with None
+                values.append(value if value and len(value.strip()) > 0 else None)
+            else:
+                values.append(value)
+
+        return values
@@ -0,0 +1,200 @@
+"""
+Export module
+"""
+
+import json
+import logging
+import os
+
+from datetime import datetime
+
+# Conditional import
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PYARROW = True
+except ImportError:
+    PYARROW = False
+
+from .database.factory import DatabaseFactory
+from .vectors import Vectors
+
+class Export(object):
+    """
+    Exports articles joined with pivoted labels to Parquet files. Exports are incremental, each run exports articles committed since the last run.
+    """
+
+    # Exported article columns
+    COLUMNS = ["Id", "Source", "Date", "Title", "Reference", "Entry", "Cluster", "Text"]
+
+    def __init__(self, index, output, vectors=False):
+        """
+        Creates a new export.
+
+        Args:
+            index: index configuration
+            output: output directory
+            vectors: if True, embeddings vectors are exported with each article
+        """
+
+        if not PYARROW:
+            raise ImportError('Export is not available - install "export" extra to enable')
+
+        self.index, self.output, self.vectors = index, output, vectors
+
+        # Label columns, aggregate categories have a single value, other categories have a value per label
+        self.labels = []
+        for name, config in index["labels"].items():
+            self.labels.extend([(name, name)] if "aggregate" in config else [(name, value) for value in config["values"]])
+
+    def __call__(self, chunk=900):
+        """
+        Runs the export.
+
+        Args:
+            chunk: number of articles to process at a time, bounded by the database query parameter limit
+        """
+
+        os.makedirs(self.output, exist_ok=True)
+
+        # Last exported article
+        state = os.path.join(self.output, "export.json")
+        last = {}
+        if os.path.exists(state):
+            with open(state, "r") as f:
+                last = json.load(f)
+
+        # Read-only connection, doesn't lock the database for the indexer
+        database = DatabaseFactory.create(self.index, readonly=True)
+
+        # Articles committed since last export. Concurrent writers can commit rows below the last exported sequence, a window below
+        # the last sequence is re-read and rows already exported are skipped. Exports written by earlier versions stored the last
+        # entry date.
+        sequence, window = database.SEQUENCE, database.overlap()
+        exported = {uid: seq for seq, uid in last.get("ids", [])}
+
+        where, parameters = "", None
+        if "sequence" in last:
+            where, parameters = "WHERE %s > ?" % sequence, [last["sequence"] - window]
+        elif "entry" in last:
+            where, parameters = "WHERE Entry > ?", [last["entry"]]
+
+        sql = "SELECT %s, %s FROM articles %s ORDER BY %s" % (", ".join(Export.COLUMNS), sequence, where, sequence)
+
+        # Vector lookup
+        vectors = self.encoder() if self.vectors else None
+
+        path = os.path.join(self.output, "articles-%s.parquet" % datetime.now().strftime("%Y%m%d%H%M%S"))
+        writer, count = None, 0
+
+        for rows in database.stream(sql, parameters, chunk):
+            # Highest sequence read
+            last["sequence"] = rows[-1][-1]
+
+            rows = [row for row in rows if row[0] not in exported]
+            if not rows:
+                continue
+
+            table = pa.Table.from_pydict(self.columns(database, rows, vectors), schema=self.schema())
+
+            writer = writer if writer else pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+
+            exported.update((row[0], row[-1]) for row in rows)
+
+            count += len(rows)
+            logging.info("Exported %d articles", count)
+
+        database.close()
+
+        if writer:
+            writer.close()
+
+            # Store last exported sequence and the ids exported within the re-read window
+            last = {"sequence": last["sequence"], "ids": [[seq, uid] for uid, seq in exported.items() if seq > last["sequence"] - window]}
+            with open(state, "w") as f:
+                json.dump(last, f)
+
+        logging.info("Export complete, %d new articles", count)
+
+    def encoder(self):
+        """
+        Creates a function that returns vectors for a list of (id, title) rows. Uses stored full precision vectors when available,
+        otherwise titles are encoded with the embeddings model.
+
+        Returns:
+            function
+        """
+
+        path = self.index["path"]
+        if os.path.exists(os.path.join(path, "vectors.npy")):
+            stored = Vectors(path)
+            return lambda rows: [stored.vectors[stored.positions[uid]].tolist() if uid in stored.positions else None for uid, _ in rows]
+
+        from txtai.embeddings import Embeddings
+
+        embeddings = Embeddings()
+        embeddings.load(path)
+
+        return lambda rows: [vector.tolist() for vector in embeddings.batchtransform([(uid, text, None) for uid, text in rows])]
+
+    def schema(self):
+        """
+        Builds the export schema.
+
+        Returns:
+            pyarrow schema
+        """
+
+        fields = [(column.lower(), pa.string()) for column in Export.COLUMNS]
+        fields += [(self.name(category, name), pa.float64()) for category, name in self.labels]
+
+        if self.vectors:
+            fields.append(("vector", pa.list_(pa.float32())))
+
+        return pa.schema(fields)
+
+    def columns(self, database, rows, vectors):
+        """
+        Builds export columns for a chunk of articles.
+
+        Args:
+            database: database connection
+            rows: article rows
+            vectors: vector lookup function, if vectors are exported
+
+        Returns:
+            dict of column name to values
+        """
+
+        uids = [row[0] for row in rows]
+
+        # Pivot labels
+        labels = {}
+        sql = "SELECT Article, Category, Name, Value FROM labels WHERE Article IN (%s)" % ", ".join(["?"] * len(uids))
+        for uid, category, name, value in database.query(sql, uids):
+            labels[(uid, category, name)] = value
+
+        columns = {column.lower(): [None if row[x] is None else str(row[x]) for row in rows] for x, column in enumerate(Export.COLUMNS)}
+        for category, name in self.labels:
+            columns[self.name(category, name)] = [labels.get((uid, category, name)) for uid in uids]
+
+        if vectors:
+            columns["vector"] = vectors([(row[0], row[3]) for row in rows])
+
+        return columns
+
+    def name(self, category, name):
+        """
+        Builds a label column name.
+
+        Args:
+            category: label category
+            name: label name
+
+        Returns:
+            column name
+        """
+
+        return category if category == name else "%s.%s" % (category, name)
@@ -0,0 +1,238 @@
+"""
+Extract module
+"""
+
+import codecs
+import logging
+import re
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+import requests
+
+class Extract(object):
+    """
+    Fetches article urls and extracts the main text content. Urls are fetched concurrently with a bounded thread pool. Requests to
+    the same domain are rate limited and each request is bounded by a timeout and a maximum download size.
+    """
+
+    # Charset declared in a Content-Type header or html meta tag
+    CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+    def __init__(self, config):
+        """
+        Creates a new extractor.
+
+        Args:
+            config: extract configuration
+        """
+
+        # Maximum number of concurrent requests
+        self.workers = config.get("workers", 8)
+
+        # Request timeout in seconds and maximum download size in bytes
+        self.timeout, self.size = config.get("timeout", 10), config.get("size", 1024 ** 2)
+
+        # Minimum number of seconds between requests to the same domain
+        self.rate = config.get("rate", 1.0)
+
+        # Next available request time per domain
+        self.slots = {}
+
+        # Connection pooling across requests
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = config.get("agent", "tldrstory")
+
+    def __call__(self, articles):
+        """
+        Extracts text for a batch of articles. Requests are only handed to the thread pool once the domain rate limit allows it and a
+        thread is free. Each domain has at most one request running, a slow domain never holds threads that could serve other domains.
+
+        Args:
+            articles: list of article objects
+
+        Returns:
+            list of extracted text, one per article, None if text couldn't be extracted
+        """
+
+        if not articles:
+            return []
+
+        # Pending urls per domain, in article order
+        pending = {}
+        for x, article in enumerate(articles):
+            pending.setdefault(urlparse(article.url).hostname, deque()).append((x, article.url))
+
+        workers = min(self.workers, len(articles))
+        texts, running = [None] * len(articles), {}
+
+        with ThreadPoolExecutor(workers) as executor:
+            while pending or running:
+                # Start requests for idle domains with an open slot while threads are free
+                now, active = time.time(), {host for _, host in running.values()}
+                ready = [host for host in pending if host not in active and self.slots.get(host, 0) <= now]
+                for host in ready[:workers - len(running)]:
+                    x, url = pending[host].popleft()
+                    running[executor.submit(self.extract, url)] = (x, host)
+
+                    # Reserve next request slot for this domain
+                    self.slots[host] = now + self.rate
+                    if not pending[host]:
+                        del pending[host]
+
+                # Wait for a request to complete or the next idle domain slot to open
+                slots = [self.slots[host] for host in pending if host not in active]
+                timeout = max(0, min(slots) - now) if slots and len(running) < workers else None
+                if running:
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        texts[running.pop(future)[0]] = future.result()
+                elif timeout:
+                    time.sleep(timeout)
+
+        logging.info("Extracted text for %d of %d articles", len([text for text in texts if text]), len(articles))
+
+        return texts
+
+    def extract(self, url):
+        """
+        Fetches a url and extracts the main text content.
+
+        Args:
+            url: input url
+
+        Returns:
+            extracted text, None if text couldn't be extracted
+        """
+
+        try:
+            html = self.fetch(url)
+            return Text.parse(html) if html else None
+        # pylint: disable=W0703
+        except Exception as e:
+            logging.debug("Failed to extract %s: %s", url, e)
+            return None
+
+    def fetch(self, url):
+        """
+        Downloads a html page, up to the maximum download size.
+
+        Args:
+            url: input url
+
+        Returns:
+            html, None if url isn't a html page
+        """
+
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            ctype = response.headers.get("Content-Type", "")
+            if response.status_code != 200 or "html" not in ctype:
+                return None
+
+            # Read up to maximum size
+            content = b""
+            for chunk in response.iter_content(65536):
+                content += chunk
+                if len(content) >= self.size:
+                    break
+
+            content = content[:self.size]
+            return content.decode(self.encoding(content, ctype), errors="ignore")
+
+    def encoding(self, content, ctype):
+        """
+        Gets the character encoding of a html page. Checks the Content-Type header charset, then the html meta charset and then
+        detects the encoding from the content. requests defaults html without a header charset to ISO-8859-1, which isn't used here.
+
+        Args:
+            content: html bytes
+            ctype: Content-Type header
+
+        Returns:
+            encoding name, defaults to utf-8
+        """
+
+        match = Extract.CHARSET.search(ctype) or Extract.CHARSET.search(content[:4096].decode("ascii", errors="ignore"))
+        encoding = match.group(1) if match else None
+
+        # Detect encoding from content
+        if not encoding and requests.compat.chardet:
+            encoding = requests.compat.chardet.detect(content)["encoding"]
+
+        try:
+            return codecs.lookup(encoding).name if encoding else "utf-8"
+        except LookupError:
+            return "utf-8"
+
+class Text(HTMLParser):
+    """
+    Extracts paragraph text from html, skipping page elements that aren't part of the main content.
+    """
+
+    # Elements skipped along with their content
+    SKIP = {"script", "style", "noscript", "nav", "header", "footer", "aside", "form", "figure"}
+
+    # Minimum number of words in a paragraph, shorter paragraphs are usually captions or boilerplate
+    WORDS = 8
+
+    @staticmethod
+    def parse(html):
+        """
+        Extracts text from html.
+
+        Args:
+            html: html content
+
+        Returns:
+            paragraphs joined with newlines, None if no text found
+        """
+
+        parser = Text()
+        parser.feed(html)
+        parser.close()
+
+        return "\n".join(parser.paragraphs) if parser.paragraphs else None
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+
+        # Current depth of skipped elements and the paragraph being read
+        self.skip, self.paragraph = 0, None
+        self.paragraphs = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in Text.SKIP:
+            self.skip += 1
+        elif tag == "p" and not self.skip:
+            self.end()
+            self.paragraph = []
+
+    def handle_endtag(self, tag):
+        if tag in Text.SKIP:
+            self.skip = max(0, self.skip - 1)
+        elif tag == "p":
+            self.end()
+
+    def handle_data(self, data):
+        if self.paragraph is not None and not self.skip:
+            self.paragraph.append(data)
+
+    def close(self):
+        super().close()
+        self.end()
+
+    def end(self):
+        """
+        Ends the current paragraph.
+        """
+
+        if self.paragraph is not None:
+            paragraph = " ".join("".join(self.paragraph).split())
+            if len(paragraph.split()) >= Text.WORDS:
+                self.paragraphs.append(paragraph)
+
+        self.paragraph = None
@@ -0,0 +1,65 @@
+"""
+Filter module
+"""
+
+import re
+
+from urllib.parse import urlparse
+
+class Filter(object):
+    """
+    Compiled url ignore list. Plain host names are matched against the url host and its parent domains with set lookups. All other
+    patterns are combined into a single regular expression.
+    """
+
+    # Plain host name, for example reddit.com
+    HOST = re.compile(r"[\w-]+(\.[\w-]+)+")
+
+    def __init__(self, ignore):
+        """
+        Compiles an ignore list.
+
+        Args:
+            ignore: list of url patterns, strings and regular expressions are supported
+        """
+
+        ignore = ignore if ignore else []
+
+        # Ignored domains
+        self.domains = set(pattern.lower() for pattern in ignore if Filter.HOST.fullmatch(pattern))
+
+        # Combined expression for remaining patterns
+        patterns = [pattern for pattern in ignore if not Filter.HOST.fullmatch(pattern)]
+        self.pattern = re.compile("|".join("(?:%s)" % pattern for pattern in patterns)) if patterns else None
+
+    def __call__(self, articles):
+        """
+        Filters a batch of articles, removing articles without an external link and articles with ignored urls.
+
+        Args:
+            articles: list of article objects
+
+        Returns:
+            list of articles not ignored
+        """
+
+        return [article for article in articles if article.url.startswith("http") and not self.ignored(article.url)]
+
+    def ignored(self, url):
+        """
+        Checks if a url matches the ignore list.
+
+        Args:
+            url: input url
+
+        Returns:
+            True if url is ignored, False otherwise
+        """
+
+        if self.domains:
+            # Check host and each parent domain, www.reddit.com matches www.reddit.com and reddit.com
+            parts = (urlparse(url).hostname or "").split(".")
+            if any(".".join(parts[x:]) in self.domains for x in range(len(parts))):
+                return True
+
+        return bool(self.pattern and self.pattern.search(url))
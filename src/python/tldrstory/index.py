@@ -3,7 +3,6 @@ Indexing module
 """
 
 import logging
-import re
 import sys
 import time
 
@@ -11,123 +10,18 @@ from datetime import datetime
 
 import yaml
 
-from croniter import croniter
-from txtai.embeddings import Embeddings
-from txtai.pipeline import Labels
-
+from .cache import Cache
+from .extract import Extract
+from .filter import Filter
+from .database.factory import DatabaseFactory
+from .pipeline import Pipeline
 from .source.factory import Factory
-from .sqlite import SQLite
 
 class Index(object):
     """
     Methods to build a new embeddings index.
     """
 
-    @staticmethod
-    def baseurl(url):
-        """
-        Extracts a base unique url for the input url. Used to help with url duplicate detection.
-
-        Args:
-            url: input url
-
-        Returns:
-            base url
-        """
-
-        # Remove parameters
-        url = url.split("?", 1)[0]
-
-        # Remove leading http(s?)://www
-        url = re.sub(r"^http(s)?:\/\/(www.)?", "", url)
-
-        # Remove trailing index.html
-        url = re.sub(r"(index.htm(l)?)$", "", url)
-
-        # Remove trailing slashes
-        url = re.sub(r"\/?$", "", url)
-
-        return url
-
-    @staticmethod
-    def accept(database, article, ignore):
-        """
-        Filters an article based on a series of rules.
-
-        Args:
-            database: database connection
-            article: article object
-            ignore: list of domains to ignore
-
-        Returns:
-            True if accepted, False otherwise
-        """
-
-        # Get base url
-        baseurl = Index.baseurl(article.url)
-
-        # Check that article doesn't already exist
-        database.cur.execute("SELECT 1 FROM articles WHERE Id=? OR Reference LIKE ?", [article.uid, "%" + baseurl + "%"])
-
-        # Accept submission if:
-        #  - Submission id or url doesn't already exist
-        #  - Submission link isn't an ignored pattern
-        return not database.cur.fetchone() and article.url.startswith("http") and \
-               all([not re.search(pattern, article.url) for pattern in ignore])
-
-    @staticmethod
-    def labels(name, config, result):
-        """
-        Transforms a result into a set of labels. This method will create an aggregate field
-        and normalize the range if set. Otherwise, the raw result is returned.
-
-        Args:
-            name: label name
-            config: label configuration
-            result: classifier results
-
-        Returns:
-            transformed labels and scores
-        """
-
-        # Build aggregate value for a list of fields
-        if "aggregate" in config:
-            score = sum([score for label, score in result if label in config["aggregate"]])
-
-            # Normalize range
-            if "normalize" in config:
-                minscore, maxscore = config["normalize"]
-                score = min(max(0.0, (score - minscore) / (maxscore - minscore)), 1.0)
-
-            return [(name, score)]
-
-        # Return results
-        return result
-
-    @staticmethod
-    def embeddings(index, database):
-        """
-        Builds an embeddings index.
-
-        Args:
-            index: index configuration
-            database: database handle with content to index
-        """
-
-        # Create embeddings model, backed by sentence-transformers & transformers
-        embeddings = Embeddings(index["embeddings"])
-
-        database.execute("SELECT Id, Title FROM articles")
-
-        # Create an index for the list of articles
-        articles = [(uid, text, None) for uid, text in database.cur.fetchall()]
-        embeddings.index(articles)
-
-        logging.info("Built embedding index over %d stored articles", len(articles))
-
-        # Save index
-        embeddings.save(index["path"])
-
     @staticmethod
     def execute(index):
         """
@@ -140,43 +34,72 @@ class Index(object):
         logging.info("Refreshing index: %s", index["name"])
 
         # Text classifier
+        from txtai.pipeline import Labels
         classifier = Labels()
 
+        # Encoding cache
+        cache = Cache(index["path"]) if index.get("encodings") else None
+
         # Data source
         source = Factory.create(index)
 
         # Output database
-        database = SQLite(index["path"])
+        database = DatabaseFactory.create(index)
+
+        # Near-duplicate cluster index
+        cluster = Pipeline.cluster(index, database) if "cluster" in index else None
+
+        # Ids and base urls accepted in this run, labels of articles processed in this run
+        seen, processed = set(), {}
+
+        # Compiled url ignore list
+        ignore = Filter(index.get("ignore"))
 
-        # Process each result
-        for article in source.run():
+        # Article text extractor
+        extract = Extract(index["extract"]) if "extract" in index else None
+
+        # Process results in batches
+        for articles in Pipeline.batches(source.run()):
             # Only process recent external link posts
-            if Index.accept(database, article, index["ignore"]):
-                # Build list of classification labels for text
-                labels = []
-                for name, config in index["labels"].items():
-                    # Run classifier
-                    result = classifier(article.title, config["values"])
+            articles = Pipeline.accept(database, articles, ignore, seen)
 
-                    # Transform into labels
-                    result = Index.labels(name, config, [(config["values"][x], score) for x, score in result])
+            # Fetch linked pages and extract article text
+            texts = extract(articles) if extract else [None] * len(articles)
 
-                    # Build list of labels for text
-                    labels.extend([(None, article.uid, name) + x for x in result])
+            # Find near-duplicates of previously processed articles, including articles earlier in this batch
+            matches = []
+            for article in articles:
+                match = cluster.search(article.title) if cluster else None
+                if cluster:
+                    cluster.insert(article.uid, article.title, match[1] if match else article.uid)
 
-                # Save article
-                database.save((article, labels))
+                matches.append(match)
 
-        # Complete processing
-        database.complete()
+            # Build lists of classification labels for articles without a near-duplicate in a single classifier call
+            unmatched = [article for article, match in zip(articles, matches) if not match]
+            classified = dict(zip([article.uid for article in unmatched], Pipeline.batchclassify(classifier, index, unmatched, cache)))
+            if cluster:
+                processed.update(classified)
 
-        # Build embeddings index
-        Index.embeddings(index, database)
+            for article, text, match in zip(articles, texts, matches):
+                if match:
+                    # Reuse labels of near-duplicate article
+                    uid, cid = match
+                    labels = Pipeline.copy(database, uid, article, processed)
+                else:
+                    cid, labels = article.uid, classified[article.uid]
 
-        # Close database
-        database.close()
+                if cluster:
+                    processed[article.uid] = labels
+
+                # Save article
+                database.save((tuple(article) + (cid, text), labels))
 
-        logging.info("Indexing complete")
+        if cache:
+            cache.close()
+
+        # Build indexes
+        Pipeline.finalize(index, database)
 
     @staticmethod
     def schedule(index):
@@ -187,6 +110,8 @@ class Index(object):
             index: index configuration
         """
 
+        from croniter import croniter
+
         logging.info("Indexing scheduler enabled for %s using schedule %s", index["name"], index["schedule"])
 
         while True:
@@ -198,14 +123,19 @@ class Index(object):
             Index.execute(index)
 
     @staticmethod
-    def run(index):
+    def run(index, *args):
         """
         Runs an indexing process.
 
         Args:
             index: path to index configuration
+            args: optional sub-command followed by its arguments, supports "export output [vectors]", "backfill path [path ...]",
+                  "coordinator" and "worker"
         """
 
+        # Split sub-command and arguments
+        command, args = (args[0], args[1:]) if args else (None, ())
+
         # Initialize logging
         logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(module)-10s: %(message)s")
 
@@ -218,8 +148,24 @@ class Index(object):
             logging.error("Name is required")
             return
 
-        # Check if indexing should be scheduled or run a single time
-        if "schedule" in index:
+        # Check for a sub-command, otherwise check if indexing should be scheduled or run a single time
+        if command == "export":
+            # Export articles and labels to Parquet
+            from .export import Export
+            Export(index, args[0], len(args) > 1 and args[1] == "vectors")()
+        elif command == "backfill":
+            # Import article dumps
+            from .backfill import Backfill
+            Backfill(index)(args)
+        elif command == "coordinator":
+            # Single index run, distributes work to queue workers
+            from .coordinator import Coordinator
+            Coordinator(index)()
+        elif command == "worker":
+            # Runs tasks from the index work queue
+            from .worker import Worker
+            Worker(index)()
+        elif "schedule" in index:
             # Job scheduler
             Index.schedule(index)
         else:
@@ -227,4 +173,4 @@ class Index(object):
             Index.execute(index)
 
 if __name__ == "__main__":
-    Index.run(sys.argv[1])
+    Index.run(*sys.argv[1:])
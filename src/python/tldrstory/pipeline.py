@@ -0,0 +1,314 @@
+"""
+Pipeline module
+"""
+
+import logging
+import re
+
+from datetime import datetime, timedelta
+from itertools import islice
+
+from .aggregate import Aggregate
+from .cache import Cache
+from .cluster import Cluster
+from .vectors import Vectors
+
+class Pipeline(object):
+    """
+    Indexing steps shared by index runs, backfills and distributed runs.
+    """
+
+    # Url normalization patterns
+    PREFIX = re.compile(r"^http(s)?:\/\/(www.)?")
+    SUFFIX = re.compile(r"\/?(index.htm(l)?)?$")
+
+    @staticmethod
+    def baseurl(url):
+        """
+        Extracts a base unique url for the input url. Used to help with url duplicate detection.
+
+        Args:
+            url: input url
+
+        Returns:
+            base url
+        """
+
+        # Remove parameters
+        url = url.split("?", 1)[0]
+
+        # Remove leading http(s?)://www
+        url = Pipeline.PREFIX.sub("", url)
+
+        # Remove trailing index.html and trailing slashes
+        return Pipeline.SUFFIX.sub("", url)
+
+    @staticmethod
+    def batches(articles, size=100):
+        """
+        Groups an article stream into batches.
+
+        Args:
+            articles: article generator
+            size: batch size
+
+        Returns:
+            generator of article lists
+        """
+
+        articles = iter(articles)
+        batch = list(islice(articles, size))
+        while batch:
+            yield batch
+            batch = list(islice(articles, size))
+
+    @staticmethod
+    def accept(database, articles, ignore, seen):
+        """
+        Filters a batch of articles based on a series of rules.
+
+        Args:
+            database: database connection
+            articles: list of article objects
+            ignore: compiled ignore list
+            seen: set of ids and base urls accepted in the current run, articles may not be written to the database yet
+
+        Returns:
+            list of accepted articles
+        """
+
+        # Remove articles with ignored links, cheap checks run before database lookups
+        articles = ignore(articles)
+        if not articles:
+            return []
+
+        # Ids already stored, single query per batch
+        uids = [article.uid for article in articles]
+        stored = set(row[0] for row in database.query("SELECT Id FROM articles WHERE Id IN (%s)" % ", ".join(["?"] * len(uids)), uids))
+
+        # Accept articles if:
+        #  - Article link isn't an ignored pattern
+        #  - Article id or url doesn't already exist
+        accepted = []
+        for article in articles:
+            baseurl = Pipeline.baseurl(article.url)
+
+            exists = article.uid in stored or article.uid in seen or baseurl in seen or \
+                     database.query("SELECT 1 FROM articles WHERE Reference LIKE ? LIMIT 1", ["%" + baseurl + "%"])
+
+            if not exists:
+                seen.update([article.uid, baseurl])
+                accepted.append(article)
+
+        return accepted
+
+    @staticmethod
+    def cluster(index, database):
+        """
+        Creates a near-duplicate cluster index loaded with recently indexed articles.
+
+        Args:
+            index: index configuration
+            database: database connection
+
+        Returns:
+            Cluster
+        """
+
+        # Cluster configuration, an empty cluster setting enables clustering with defaults
+        config = index["cluster"] or {}
+        cluster = Cluster(config)
+
+        # Load articles published within the configured number of days. Windowed on publish date, backfilled articles all share
+        # the entry date of the import.
+        since = (datetime.now() - timedelta(days=config.get("days", 7))).strftime("%Y-%m-%d %H:%M:%S")
+        for uid, title, cid in database.query("SELECT Id, Title, Cluster FROM articles WHERE Date >= ?", [since]):
+            cluster.insert(uid, title, cid if cid else uid)
+
+        logging.info("Loaded %d recent articles into cluster index", len(cluster.clusters))
+
+        return cluster
+
+    @staticmethod
+    def batchclassify(classifier, index, articles, cache=None):
+        """
+        Runs the zero-shot classifier over a batch of article titles for each configured label category.
+
+        Args:
+            classifier: text classifier
+            index: index configuration
+            articles: list of article objects
+            cache: optional cache of classifier scores
+
+        Returns:
+            list of labels, one per article
+        """
+
+        labels = [[] for _ in articles]
+        if not articles:
+            return labels
+
+        # Classifier model path, cached scores are only valid for the same model and label values
+        model = classifier.pipeline.model.name_or_path if cache else None
+
+        titles = [article.title for article in articles]
+        for name, config in index["labels"].items():
+            values = config["values"]
+
+            # Run classifier, scores for previously classified titles are read from the cache
+            if cache:
+                scores = cache("labels:%s:%s" % (model, "|".join(values)), titles,
+                               lambda texts, values=values: [Pipeline.scores(result, len(values)) for result in classifier(texts, values)])
+
+                results = [sorted(enumerate(score.tolist()), key=lambda x: x[1], reverse=True) for score in scores]
+            else:
+                results = classifier(titles, values)
+
+            for x, (article, result) in enumerate(zip(articles, results)):
+                # Transform into labels
+                result = Pipeline.labels(name, config, [(values[y], score) for y, score in result])
+
+                # Build list of labels for text
+                labels[x].extend([(None, article.uid, name) + label for label in result])
+
+        return labels
+
+    @staticmethod
+    def scores(result, size):
+        """
+        Converts classifier results to a list of scores ordered by label.
+
+        Args:
+            result: list of (label index, score)
+            size: number of labels
+
+        Returns:
+            list of scores
+        """
+
+        scores = [0.0] * size
+        for x, score in result:
+            scores[x] = score
+
+        return scores
+
+    @staticmethod
+    def copy(database, uid, article, processed):
+        """
+        Copies the labels of a previously processed article to a new article.
+
+        Args:
+            database: database connection
+            uid: processed article id
+            article: article object
+            processed: labels of articles processed in the current run
+
+        Returns:
+            list of labels
+        """
+
+        if uid in processed:
+            labels = [label[2:] for label in processed[uid]]
+        else:
+            labels = database.query("SELECT Category, Name, Value FROM labels WHERE Article = ?", [uid])
+
+        return [(None, article.uid) + tuple(label) for label in labels]
+
+    @staticmethod
+    def labels(name, config, result):
+        """
+        Transforms a result into a set of labels. This method will create an aggregate field
+        and normalize the range if set. Otherwise, the raw result is returned.
+
+        Args:
+            name: label name
+            config: label configuration
+            result: classifier results
+
+        Returns:
+            transformed labels and scores
+        """
+
+        # Build aggregate value for a list of fields
+        if "aggregate" in config:
+            score = sum([score for label, score in result if label in config["aggregate"]])
+
+            # Normalize range
+            if "normalize" in config:
+                minscore, maxscore = config["normalize"]
+                score = min(max(0.0, (score - minscore) / (maxscore - minscore)), 1.0)
+
+            return [(name, score)]
+
+        # Return results
+        return result
+
+    @staticmethod
+    def embeddings(index, database):
+        """
+        Builds an embeddings index.
+
+        Args:
+            index: index configuration
+            database: database handle with content to index
+        """
+
+        # Create embeddings model, backed by sentence-transformers & transformers
+        from txtai.embeddings import Embeddings
+        embeddings = Embeddings(index["embeddings"])
+
+        # Index titles, optionally with extracted article text
+        sql = "SELECT Id, Title || ' ' || COALESCE(Text, '') FROM articles" if index.get("extract", {}).get("embeddings") else \
+              "SELECT Id, Title FROM articles"
+
+        # Full precision vectors are stored for exact re-scoring of compressed index results and to encode across worker processes.
+        # Principal components are fit on the raw model outputs, indexes with pca are built by the embeddings model.
+        config = index["embeddings"]
+        stored = (config.get("rescore") or index.get("workers", 1) > 1) and not config.get("pca")
+
+        # Only unseen text is encoded when caching is enabled
+        cache = Cache(index["path"]) if index.get("encodings") and (stored or config.get("rescore")) else None
+
+        if stored:
+            # Encode all articles once, then build the index from the stored vectors
+            Vectors.build(embeddings, database, index, sql, cache)
+            Vectors.index(embeddings, index["path"])
+        else:
+            # Create an index over all articles, streamed from the database in chunks
+            embeddings.index((uid, text, None) for rows in database.stream(sql) for uid, text in rows)
+
+        logging.info("Built embedding index over %d stored articles", database.query("SELECT COUNT(*) FROM articles")[0][0])
+
+        # Save index
+        embeddings.save(index["path"])
+
+        # Vectors for indexes with pca are encoded with the fitted components
+        if config.get("rescore") and not stored:
+            Vectors.build(embeddings, database, index, sql, cache)
+
+        if cache:
+            cache.close()
+
+    @staticmethod
+    def finalize(index, database):
+        """
+        Completes an index run after all articles are saved.
+
+        Args:
+            index: index configuration
+            database: output database
+        """
+
+        # Complete processing
+        database.complete()
+
+        # Build embeddings index
+        Pipeline.embeddings(index, database)
+
+        # Build aggregate statistics
+        Aggregate.build(index, database)
+
+        # Close database
+        database.close()
+
+        logging.info("Indexing complete")
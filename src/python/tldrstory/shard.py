@@ -0,0 +1,493 @@
+"""
+Shard module
+"""
+
+import json
+import logging
+import os
+
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock, Thread
+
+import numpy as np
+
+from .batch import Batcher
+from .cache import Cache
+from .database.factory import DatabaseFactory
+from .vectors import Vectors
+
+class Shard(object):
+    """
+    Queries a single index, which consists of an articles database and an embeddings index.
+    """
+
+    # Minimum similarity score for embeddings results
+    MINSCORE = 0.3
+
+    def __init__(self, config, callback=None):
+        """
+        Creates a new shard.
+
+        Args:
+            config: shard configuration
+            callback: optional function called with each embeddings index loaded
+        """
+
+        self.config, self.callback = config, callback
+
+        # Read-only database connection
+        self.database = DatabaseFactory.create(config, readonly=True)
+
+        # Concurrent embeddings queries are run as batches on a dedicated thread
+        batch = config.get("batch", {})
+        self.batcher = Batcher(self.batch, batch.get("size", 32), batch.get("wait", 0.0))
+
+        # Embeddings index state, indexed is the version of the loaded embeddings files
+        self.embeddings, self.vectors, self.loaded, self.lock = None, None, False, Lock()
+        self.indexed, self.reloading = None, False
+
+        # Query results cache
+        self.cache, self.cached, self.size, self.cachelock = OrderedDict(), None, config.get("cache", 1000), Lock()
+
+        # Query vectors cache, vectors remain valid when a new index version is loaded
+        self.encodings = Cache(size=config.get("encodings", 1000))
+
+        # Load the embeddings index in the background. Queries that only need the database are served while loading.
+        if config.get("warmup", True):
+            Thread(target=self.model, daemon=True).start()
+
+    @staticmethod
+    def ranked(query, request):
+        """
+        Checks if a query is ranked by similarity score. Other queries are ordered by date.
+
+        Args:
+            query: query text
+            request: FastAPI request
+
+        Returns:
+            True if results are ranked by score, False if results are ordered by date
+        """
+
+        return query not in (None, "Latest") and not query.startswith("url:") and request.query_params.get("topic") != "1"
+
+    def aggregates(self):
+        """
+        Returns aggregate statistics over all articles in this shard, which are built at the end of each index run.
+
+        Returns:
+            aggregate statistics
+        """
+
+        path = os.path.join(self.config["path"], "aggregates.json")
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+
+        return {}
+
+    def model(self):
+        """
+        Loads the embeddings index and model, if not already loaded. Concurrent callers wait for loading to complete.
+
+        Returns:
+            (embeddings index, full precision vectors)
+        """
+
+        with self.lock:
+            if not self.loaded:
+                indexed = self.version()[:2]
+                self.embeddings, self.vectors = self.load()
+                self.indexed, self.loaded = indexed, True
+
+                if self.callback:
+                    self.callback(self.embeddings)
+
+            return self.embeddings, self.vectors
+
+    def load(self):
+        """
+        Loads the embeddings index and full precision vectors stored in the shard path.
+
+        Returns:
+            (embeddings index, full precision vectors), None values if not available
+        """
+
+        path = self.config["path"]
+
+        embeddings, vectors = None, None
+        if os.path.exists(os.path.join(path, "embeddings")):
+            logging.info("Loading embeddings index from %s", path)
+
+            from txtai.embeddings import Embeddings
+
+            embeddings = Embeddings()
+            embeddings.load(path)
+
+            # Run a query to initialize the model
+            embeddings.transform((None, "warmup", None))
+
+            # Full precision vectors used to re-score results from a compressed index
+            if embeddings.config.get("rescore") and os.path.exists(os.path.join(path, "vectors.npy")):
+                vectors = Vectors(path)
+
+            logging.info("Embeddings index loaded")
+
+        return embeddings, vectors
+
+    def reload(self):
+        """
+        Loads a new index version in the background. Queries are served with the current version until loading completes. A failed
+        load is retried with a later query.
+        """
+
+        indexed = self.version()[:2]
+
+        # pylint: disable=W0703
+        try:
+            embeddings, vectors = self.load()
+        except Exception:
+            logging.exception("Failed to load new index version, keeping current version")
+            self.reloading = False
+            return
+
+        with self.lock:
+            self.embeddings, self.vectors, self.indexed = embeddings, vectors, indexed
+
+        if self.callback:
+            self.callback(embeddings)
+
+        self.reloading = False
+
+        # Clear results cached while the new version was loading
+        with self.cachelock:
+            self.cache.clear()
+
+    def find(self, query, request):
+        """
+        Executes query against embeddings index and/or database, depending on the query.
+
+        Args:
+            query: query text
+            request: FastAPI request
+
+        Returns:
+            query results
+        """
+
+        if not query:
+            return self.database.query("SELECT id, 1.0 as score FROM articles ORDER BY date DESC LIMIT 100")
+
+        elif query.startswith("url:"):
+            query = query.replace("url:", "")
+            query = "%" + query + "%"
+
+            return self.database.query("SELECT id, 1.0 as score FROM articles WHERE reference like ? ORDER BY date DESC LIMIT 100", [query])
+
+        elif "topic" in request.query_params and request.query_params["topic"] == "1":
+            return self.database.query("SELECT id, 1.0 as score FROM articles a WHERE " +
+                                       "(SELECT value FROM labels WHERE article=a.id AND category = 'topic' AND name=?) >= 0.5 " +
+                                       "ORDER BY date DESC LIMIT 100", [query])
+
+        # Maximum results, over-fetch candidates when ranking with recency. An empty recency setting enables recency with defaults.
+        limit = int(request.query_params.get("limit", 10))
+        recency = (self.config["recency"] or {}) if "recency" in self.config else None
+        candidates = limit * recency.get("candidates", 3) if recency is not None else limit
+
+        if "hybrid" in self.config:
+            results = self.hybrid(query, candidates)
+        else:
+            results = Shard.relevant(self.semantic(query, candidates).result())
+
+        return self.recency(results, recency, limit) if recency is not None else results
+
+    def semantic(self, query, limit):
+        """
+        Submits a query to run against the embeddings index as part of the next batch.
+
+        Args:
+            query: query text
+            limit: maximum results
+
+        Returns:
+            Future with query results
+        """
+
+        return self.batcher.submit(query, limit)
+
+    def batch(self, queries, limit):
+        """
+        Executes a batch of queries against the embeddings index. If full precision vectors are available, a larger set of candidates
+        is pulled from the index and re-scored.
+
+        Args:
+            queries: list of query text
+            limit: maximum results per query
+
+        Returns:
+            list of query results, one per query
+        """
+
+        # Wait for embeddings index to load
+        embeddings, vectors = self.model()
+        if not embeddings:
+            return [[] for _ in queries]
+
+        if vectors:
+            # Pull candidates from compressed index
+            candidates = embeddings.batchsearch(queries, limit * embeddings.config["rescore"])
+
+            # Re-score with full precision vectors
+            embedded = self.encodings(embeddings.config["path"], queries,
+                                      lambda texts: embeddings.batchtransform([(None, text, None) for text in texts]))
+            return [vectors.rescore(vector, [uid for uid, _ in result], limit) for vector, result in zip(embedded, candidates)]
+
+        return [[(uid, float(score)) for uid, score in result] for result in embeddings.batchsearch(queries, limit)]
+
+    def hybrid(self, query, limit):
+        """
+        Runs a keyword and an embeddings query in parallel and fuses the results.
+
+        Args:
+            query: query text
+            limit: maximum results
+
+        Returns:
+            query results
+        """
+
+        # Hybrid configuration, an empty hybrid setting enables hybrid queries with defaults
+        config = self.config["hybrid"] or {}
+
+        # Run embeddings query in the background
+        future = self.semantic(query, limit)
+
+        # Run keyword query
+        keyword = self.database.keyword(query, limit)
+
+        # Wait for embeddings results, similarity threshold is applied before fusion as fused scores are rank based
+        semantic = Shard.relevant(future.result())
+
+        return Shard.fuse(semantic, keyword, config.get("weight", 0.5), config.get("k", 60), limit)
+
+    @staticmethod
+    def relevant(results):
+        """
+        Filters embeddings results below the minimum similarity score.
+
+        Args:
+            results: list of (id, score)
+
+        Returns:
+            filtered results
+        """
+
+        return [(uid, score) for uid, score in results if score >= Shard.MINSCORE]
+
+    def recency(self, results, config, limit):
+        """
+        Re-ranks results with a time decay boost. Each result score is combined with an exponential decay of the article age, which
+        halves every halflife days.
+
+        Args:
+            results: list of (id, score)
+            config: recency configuration
+            limit: maximum results
+
+        Returns:
+            re-ranked results sorted by score
+        """
+
+        if not results:
+            return results
+
+        weight, halflife = config.get("weight", 0.1), config.get("halflife", 7)
+
+        # Lookup article dates
+        uids = [uid for uid, _ in results]
+        dates = dict(self.database.query("SELECT id, date FROM articles WHERE id IN (%s)" % ", ".join(["?"] * len(uids)), uids))
+
+        # Article age in days, articles without a date get no boost
+        dates = np.array([str(dates[uid])[:19] if dates.get(uid) else "NaT" for uid in uids], dtype="datetime64[s]")
+        age = np.maximum((np.datetime64(datetime.now(), "s") - dates) / np.timedelta64(1, "D"), 0.0)
+        boost = np.nan_to_num(0.5 ** (age / halflife))
+
+        scores = (1.0 - weight) * np.array([score for _, score in results], dtype=np.float32) + weight * boost
+
+        return [(uids[x], float(scores[x])) for x in np.argsort(-scores, kind="stable")[:limit]]
+
+    def collapse(self, results):
+        """
+        Collapses near-duplicate articles, keeping the highest ranked result for each cluster.
+
+        Args:
+            results: list of (id, score)
+
+        Returns:
+            collapsed results
+        """
+
+        if not results:
+            return results
+
+        # Lookup cluster ids
+        uids = [uid for uid, _ in results]
+        clusters = dict(self.database.query("SELECT id, cluster FROM articles WHERE id IN (%s)" % ", ".join(["?"] * len(uids)), uids))
+
+        collapsed, seen = [], set()
+        for uid, score in results:
+            cid = clusters.get(uid) or uid
+            if cid not in seen:
+                collapsed.append((uid, score))
+                seen.add(cid)
+
+        return collapsed
+
+    @staticmethod
+    def fuse(semantic, keyword, weight, k, limit):
+        """
+        Combines two ranked result lists using weighted reciprocal rank fusion. Scores are scaled such that
+        a result ranked first in both lists scores 1.0.
+
+        Args:
+            semantic: embeddings query results
+            keyword: keyword query results
+            weight: semantic results weight, keyword results are weighted by 1 - weight
+            k: rank fusion smoothing constant
+            limit: maximum results
+
+        Returns:
+            fused results sorted by score
+        """
+
+        scores = {}
+        for results, factor in [(semantic, weight), (keyword, 1.0 - weight)]:
+            for x, (uid, _) in enumerate(results):
+                scores[uid] = scores.get(uid, 0.0) + factor * (k + 1) / (k + x + 1)
+
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:limit]
+
+    def search(self, query, request):
+        """
+        Runs a query and enriches results with content. Results are cached until the shard is rebuilt.
+
+        Args:
+            query: query text
+            request: FastAPI request
+
+        Returns:
+            list of (score, result)
+        """
+
+        # Check cache, clear when a new index version is detected
+        key = (query, tuple(sorted(request.query_params.items())))
+        with self.cachelock:
+            version = self.version()
+            if version != self.cached:
+                self.cache.clear()
+                self.cached = version
+
+            # Reload embeddings index when a loaded index was rebuilt and the index run completed
+            if self.loaded and not self.reloading and version[:2] != self.indexed and Shard.complete(version):
+                self.reloading = True
+                Thread(target=self.reload, daemon=True).start()
+
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+
+        results = self.enrich(query, request)
+
+        # Don't cache similarity queries run before the embeddings index is loaded
+        if self.loaded or not Shard.ranked(query, request):
+            with self.cachelock:
+                self.cache[key] = results
+                if len(self.cache) > self.size:
+                    self.cache.popitem(last=False)
+
+        return results
+
+    def version(self):
+        """
+        Builds an index version from the modification times of files written at the end of each index run. The first two
+        elements are the embeddings index files.
+
+        Returns:
+            index version
+        """
+
+        return tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in
+                     [os.path.join(self.config["path"], name) for name in ["embeddings", "vectors.npy", "aggregates.json"]])
+
+    @staticmethod
+    def complete(version):
+        """
+        Checks if the embeddings files in an index version are fully written. Aggregates are written last in each index run, embeddings
+        files are complete once aggregates are newer.
+
+        Args:
+            version: index version
+
+        Returns:
+            True if the embeddings files are complete
+        """
+
+        embeddings, aggregates = [x for x in version[:2] if x], version[2]
+        return bool(embeddings) and aggregates is not None and max(embeddings) <= aggregates
+
+    def enrich(self, query, request):
+        """
+        Runs a query and enriches results with content.
+
+        Args:
+            query: query text
+            request: FastAPI request
+
+        Returns:
+            list of (score, result)
+        """
+
+        results, filters = [], []
+
+        # Unpack filters
+        if "filters" in request.query_params:
+            filters = request.query_params["filters"].split(":")
+
+        # Pull results
+        matches = self.find(query if query != "Latest" else None, request)
+
+        # Collapse near-duplicate articles
+        if request.query_params.get("cluster") == "1":
+            matches = self.collapse(matches)
+
+        for uid, score in matches:
+            # Statement parameters
+            params = []
+
+            # Build sql statement
+            sql = "SELECT date, title, reference"
+
+            # Build slider select sql
+            for name in filters:
+                sql += ", (SELECT value FROM labels WHERE article=? AND category=? AND name=?) AS %s" % name
+                params.extend([uid, name, name])
+
+            sql += " FROM articles WHERE id = ?"
+            params.append(uid)
+
+            # Add slider range filters, wrap statement to filter on slider columns
+            sql = "SELECT * FROM (%s) a WHERE 1=1" % sql
+            for name in filters:
+                # Get current range from request
+                current = [float(x) for x in request.query_params[name].split(":")]
+
+                sql += " AND %s >= ? AND %s <= ?" % (name, name)
+                params.extend(current)
+
+            # Run statement
+            result = self.database.query(sql, params)
+            if result:
+                results.append((score, result[0]))
+
+        return results
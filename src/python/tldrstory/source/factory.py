@@ -2,9 +2,6 @@
 Factory module
 """
 
-from .reddit import Reddit
-from .rss import RSS
-
 class Factory(object):
     """
     Factory methods for creating sources.
@@ -22,11 +19,14 @@ class Factory(object):
             source object
         """
 
+        # Sources are imported when selected, each source depends on a separate client library
         if "reddit" in config:
             # Reddit API
+            from .reddit import Reddit
             return Reddit(config)
         elif "rss" in config:
             # List of RSS Feeds
+            from .rss import RSS
             return RSS(config)
         elif "source" in config:
             # Dynamically create source from full object path
@@ -46,3 +46,8 @@ class Reddit(Source):
                     articles.append(article)
 
         return articles
+
+    def units(self):
+        # Unit per query
+        api = self.config["reddit"]
+        return [{**self.config, "reddit": {**api, "queries": [query]}} for query in api["queries"]]
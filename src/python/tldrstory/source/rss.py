@@ -46,3 +46,7 @@ class RSS(Source):
                 articles.append(article)
 
         return articles
+
+    def units(self):
+        # Unit per feed
+        return [{**self.config, "rss": [url]} for url in self.config["rss"]]
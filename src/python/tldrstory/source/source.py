@@ -48,6 +48,19 @@ class Source(object):
 
         return []
 
+    def units(self):
+        """
+        Splits this source into independent units of work, used to distribute reading a source across workers. Each unit is
+        an index configuration that creates a source reading a part of the data.
+
+        Sources can override this method, the default is a single unit reading all data.
+
+        Returns:
+            list of index configurations
+        """
+
+        return [self.config]
+
     def now(self):
         """
         Builds a timestamp for the current time.
@@ -0,0 +1,234 @@
+"""
+Vectors module
+"""
+
+import json
+import logging
+import os
+
+from collections import deque
+from multiprocessing import get_context
+from multiprocessing.pool import AsyncResult
+
+import numpy as np
+
+class Vectors(object):
+    """
+    Full precision copy of embeddings index vectors. Vectors are stored on disk and memory mapped, which allows exact re-scoring of candidates
+    pulled from a compressed (quantized) embeddings index without keeping full precision vectors in memory.
+    """
+
+    def __init__(self, path):
+        """
+        Loads vectors stored in path.
+
+        Args:
+            path: index path
+        """
+
+        with open(os.path.join(path, "vectors.json"), "r") as f:
+            self.ids = json.load(f)
+
+        # Map of id to vector row
+        self.positions = {uid: x for x, uid in enumerate(self.ids)}
+
+        # Memory map vectors, only rows that are accessed are paged in
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+
+    def rescore(self, query, uids, limit):
+        """
+        Scores a list of candidate ids using full precision vectors.
+
+        Args:
+            query: query vector
+            uids: candidate ids
+            limit: maximum results
+
+        Returns:
+            list of (id, score) sorted by score
+        """
+
+        uids = [uid for uid in uids if uid in self.positions]
+        if not uids:
+            return []
+
+        # Inner product is equal to cosine similarity on normalized vectors
+        scores = self.vectors[[self.positions[uid] for uid in uids]] @ query
+
+        return [(uids[x], float(scores[x])) for x in np.argsort(-scores)[:limit]]
+
+    @staticmethod
+    def build(embeddings, database, index, sql, cache=None, batch=1024):
+        """
+        Encodes all stored articles and writes full precision vectors to the index path. Articles are streamed from the database in chunks.
+        If the index configuration sets workers, chunks are encoded in parallel across worker processes unless pca is enabled. Vectors
+        are encoded with transform, which doesn't require a built index.
+
+        Args:
+            embeddings: embeddings model
+            database: database handle with content to index
+            index: index configuration
+            sql: query returning (id, text) rows to encode
+            cache: optional vector cache, only text not in the cache is encoded
+            batch: number of articles to encode at a time
+        """
+
+        path, workers = index["path"], index.get("workers", 1)
+
+        # Principal components are fit on the indexed data, vectors can't be reused across runs. Worker processes load the model
+        # without the fitted components, encode in this process.
+        if index["embeddings"].get("pca"):
+            cache, workers = None, 1
+
+        count = database.query("SELECT COUNT(*) FROM articles")[0][0]
+
+        # Worker processes each load a copy of the model
+        pool = get_context("spawn").Pool(workers, Vectors.initialize, (index["embeddings"], workers)) if workers > 1 else None
+
+        ids, vectors = [], None
+        for uids, embedded in Vectors.encoded(embeddings, database.stream(sql, batch=batch), pool, workers, cache):
+            # Create output file once vector dimensions are known. Written to a temporary file, the current file may be memory
+            # mapped by a running API.
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(os.path.join(path, "vectors.npy.tmp"), mode="w+", dtype=np.float32,
+                                                    shape=(count, embedded.shape[1]))
+
+            vectors[len(ids):len(ids) + len(uids)] = embedded
+            ids.extend(uids)
+
+        if pool:
+            pool.close()
+            pool.join()
+
+        if vectors is not None:
+            vectors.flush()
+            del vectors
+
+            with open(os.path.join(path, "vectors.json.tmp"), "w") as f:
+                json.dump(ids, f)
+
+            # Replace current files, readers keep the previous version mapped until reloaded
+            os.replace(os.path.join(path, "vectors.json.tmp"), os.path.join(path, "vectors.json"))
+            os.replace(os.path.join(path, "vectors.npy.tmp"), os.path.join(path, "vectors.npy"))
+
+        logging.info("Stored %d full precision vectors", len(ids))
+
+    @staticmethod
+    def index(embeddings, path):
+        """
+        Builds the approximate nearest neighbor index of an embeddings model from stored full precision vectors. Stored vectors are
+        normalized, same as vectors encoded by the embeddings index method.
+
+        Args:
+            embeddings: embeddings model
+            path: index path
+        """
+
+        from txtai.ann import ANNFactory
+
+        vectors = Vectors(path)
+
+        # Embeddings metadata
+        embeddings.config["ids"] = vectors.ids
+        embeddings.config["dimensions"] = vectors.vectors.shape[1]
+
+        # Create and build the index, vectors are read into memory
+        embeddings.embeddings = ANNFactory.create(embeddings.config)
+        embeddings.embeddings.index(np.array(vectors.vectors))
+
+    @staticmethod
+    def encoded(embeddings, chunks, pool, workers, cache=None):
+        """
+        Encodes chunks of articles, in order. When a worker pool is set, the number of chunks in flight is bounded to limit memory usage.
+
+        Args:
+            embeddings: embeddings model
+            chunks: chunks of (id, text) rows
+            pool: worker pool, encodes in this process if None
+            workers: number of workers
+            cache: optional vector cache
+
+        Returns:
+            generator of (ids, vectors) per chunk
+        """
+
+        model = embeddings.config["path"]
+
+        pending = deque()
+        for rows in chunks:
+            # Look up cached vectors, only rows not in the cache are encoded
+            cached = cache.get(model, [text for _, text in rows]) if cache else [None] * len(rows)
+            missing = [row for row, vector in zip(rows, cached) if vector is None]
+
+            if pool and missing:
+                result = pool.apply_async(Vectors.encode, (missing,))
+            else:
+                result = Vectors.encode(missing, embeddings) if missing else None
+
+            pending.append((rows, cached, missing, result))
+            if len(pending) > (2 * workers if pool else 0):
+                yield Vectors.merge(model, *pending.popleft(), cache)
+
+        while pending:
+            yield Vectors.merge(model, *pending.popleft(), cache)
+
+    @staticmethod
+    def merge(model, rows, cached, missing, result, cache):
+        """
+        Merges cached and encoded vectors for a chunk of articles. Encoded vectors are added to the cache.
+
+        Args:
+            model: model id
+            rows: chunk of (id, text) rows
+            cached: cached vectors, None for rows not in the cache
+            missing: rows not in the cache
+            result: encoded vectors for missing rows, may be an asynchronous result
+            cache: optional vector cache
+
+        Returns:
+            (ids, vectors)
+        """
+
+        encoded = result.get() if isinstance(result, AsyncResult) else result
+        if missing and cache:
+            cache.put(model, [text for _, text in missing], encoded)
+
+        # Fill rows not in the cache
+        encoded = iter(encoded if missing else [])
+        vectors = np.array([vector if vector is not None else next(encoded) for vector in cached], dtype=np.float32)
+
+        return [uid for uid, _ in rows], vectors
+
+    @staticmethod
+    def initialize(config, workers):
+        """
+        Initializes a worker process.
+
+        Args:
+            config: embeddings configuration
+            workers: number of workers
+        """
+
+        import torch
+        from txtai.embeddings import Embeddings
+
+        # Split available cores across workers
+        torch.set_num_threads(max(1, os.cpu_count() // workers))
+
+        Vectors.WORKER = Embeddings(config)
+
+    @staticmethod
+    def encode(rows, embeddings=None):
+        """
+        Encodes a chunk of articles.
+
+        Args:
+            rows: list of (id, text) rows
+            embeddings: embeddings model, defaults to the worker process model
+
+        Returns:
+            vectors
+        """
+
+        embeddings = embeddings if embeddings else Vectors.WORKER
+        return np.array(embeddings.batchtransform([(uid, text, None) for uid, text in rows]), dtype=np.float32)
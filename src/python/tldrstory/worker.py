@@ -0,0 +1,120 @@
+"""
+Worker module
+"""
+
+import logging
+import os
+import socket
+import time
+
+from .cache import Cache
+from .extract import Extract
+from .pipeline import Pipeline
+from .source.factory import Factory
+from .source.source import Source
+from .workqueue import WorkQueue
+
+class Worker(object):
+    """
+    Runs fetch and classify tasks from an index work queue. Any number of workers can consume the same queue, results are written to
+    the articles database by the coordinator.
+    """
+
+    def __init__(self, index):
+        """
+        Creates a new worker.
+
+        Args:
+            index: index configuration
+        """
+
+        self.index = index
+        self.config = index.get("queue", {})
+
+        # Work queue stored in the index path
+        os.makedirs(index["path"], exist_ok=True)
+        self.queue = WorkQueue(os.path.join(index["path"], "queue.db"))
+
+        # Unique worker name across hosts
+        self.name = "%s:%d" % (socket.gethostname(), os.getpid())
+
+        # Article schema
+        self.article = Source(index).article
+
+        # Text classifier, loaded with the first classify task
+        self.classifier = None
+
+        # Encoding cache
+        self.cache = Cache(index["path"]) if index.get("encodings") else None
+
+        # Article text extractor
+        self.extract = Extract(index["extract"]) if "extract" in index else None
+
+    def __call__(self):
+        """
+        Runs tasks until the queue is idle for the configured number of seconds. Runs indefinitely if idle isn't set.
+        """
+
+        idle, poll = self.config.get("idle"), self.config.get("poll", 1.0)
+
+        logging.info("Worker %s started for %s", self.name, self.index["name"])
+
+        last = time.time()
+        while not idle or time.time() - last < idle:
+            task = self.queue.take(self.name)
+            if not task:
+                time.sleep(poll)
+                continue
+
+            uid, name, data = task
+            try:
+                result = self.fetch(data) if name == "fetch" else self.classify(data)
+                self.queue.complete(uid, self.name, result)
+            # pylint: disable=W0703
+            except Exception as e:
+                logging.exception("Task %d (%s) failed", uid, name)
+                self.queue.fail(uid, self.name, str(e))
+
+            last = time.time()
+
+        self.queue.close()
+
+        if self.cache:
+            self.cache.close()
+
+        logging.info("Worker %s stopped, queue idle", self.name)
+
+    def fetch(self, unit):
+        """
+        Reads a source unit of work.
+
+        Args:
+            unit: index configuration for the unit
+
+        Returns:
+            list of articles
+        """
+
+        return [list(article) for article in Factory.create(unit).run()]
+
+    def classify(self, articles):
+        """
+        Extracts text and classifies a batch of articles.
+
+        Args:
+            articles: list of articles
+
+        Returns:
+            list of (labels, text), one per article
+        """
+
+        if not self.classifier:
+            from txtai.pipeline import Labels
+            self.classifier = Labels()
+
+        articles = [self.article(*article) for article in articles]
+
+        # Fetch linked pages and extract article text
+        texts = self.extract(articles) if self.extract else [None] * len(articles)
+
+        return list(zip(Pipeline.batchclassify(self.classifier, self.index, articles, self.cache), texts))
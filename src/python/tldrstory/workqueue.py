@@ -0,0 +1,157 @@
+"""
+Work queue module
+"""
+
+import json
+import sqlite3
+import time
+
+class WorkQueue(object):
+    """
+    Durable task queue stored in a SQLite database. Tasks are claimed by workers in a write transaction, which allows multiple worker
+    processes to consume the same queue. Completed tasks hold a result until read by the coordinator.
+    """
+
+    # Task states
+    PENDING, RUNNING, DONE, FAILED = 0, 1, 2, 3
+
+    # Tasks schema
+    CREATE_TABLE = "CREATE TABLE IF NOT EXISTS tasks (Id INTEGER PRIMARY KEY, Type TEXT, Data TEXT, Status INTEGER, Worker TEXT, " + \
+                   "Attempts INTEGER DEFAULT 0, Updated REAL, Result TEXT)"
+    CREATE_INDEX = "CREATE INDEX IF NOT EXISTS tasks_status ON tasks(Status)"
+
+    def __init__(self, path, timeout=30.0):
+        """
+        Opens a queue, creating it if necessary.
+
+        Args:
+            path: queue database file
+            timeout: number of seconds to wait for locks held by other processes
+        """
+
+        # Transactions are managed explicitly
+        self.db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+
+        self.db.execute(WorkQueue.CREATE_TABLE)
+        self.db.execute(WorkQueue.CREATE_INDEX)
+
+    def put(self, name, data):
+        """
+        Adds a task.
+
+        Args:
+            name: task type
+            data: task data, must be JSON serializable
+        """
+
+        self.db.execute("INSERT INTO tasks (Type, Data, Status, Updated) VALUES (?, ?, ?, ?)",
+                        [name, json.dumps(data, default=str), WorkQueue.PENDING, time.time()])
+
+    def take(self, worker):
+        """
+        Claims the next pending task.
+
+        Args:
+            worker: worker name
+
+        Returns:
+            (id, type, data) if a task is available, None otherwise
+        """
+
+        # Write lock prevents two workers from claiming the same task
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT Id, Type, Data FROM tasks WHERE Status = ? ORDER BY Id LIMIT 1", [WorkQueue.PENDING]).fetchone()
+            if row:
+                self.db.execute("UPDATE tasks SET Status = ?, Worker = ?, Attempts = Attempts + 1, Updated = ? WHERE Id = ?",
+                                [WorkQueue.RUNNING, worker, time.time(), row[0]])
+        finally:
+            self.db.execute("COMMIT")
+
+        return (row[0], row[1], json.loads(row[2])) if row else None
+
+    def complete(self, uid, worker, result):
+        """
+        Stores the result of a task. Results are ignored if the task was reassigned to another worker.
+
+        Args:
+            uid: task id
+            worker: worker name
+            result: task result, must be JSON serializable
+        """
+
+        self.db.execute("UPDATE tasks SET Status = ?, Result = ?, Updated = ? WHERE Id = ? AND Status = ? AND Worker = ?",
+                        [WorkQueue.DONE, json.dumps(result, default=str), time.time(), uid, WorkQueue.RUNNING, worker])
+
+    def fail(self, uid, worker, error, attempts=3):
+        """
+        Marks a task as failed. Tasks are retried until the maximum number of attempts is reached.
+
+        Args:
+            uid: task id
+            worker: worker name
+            error: error message
+            attempts: maximum number of attempts
+        """
+
+        self.db.execute("UPDATE tasks SET Status = CASE WHEN Attempts < ? THEN ? ELSE ? END, Result = ?, Updated = ? " +
+                        "WHERE Id = ? AND Status = ? AND Worker = ?",
+                        [attempts, WorkQueue.PENDING, WorkQueue.FAILED, json.dumps(error), time.time(), uid, WorkQueue.RUNNING, worker])
+
+    def requeue(self, timeout, attempts=3):
+        """
+        Returns tasks claimed by workers that stopped responding to the queue. Tasks that reached the maximum number of attempts are
+        marked as failed.
+
+        Args:
+            timeout: number of seconds after which a running task is considered abandoned
+            attempts: maximum number of attempts
+        """
+
+        self.db.execute("UPDATE tasks SET Status = CASE WHEN Attempts < ? THEN ? ELSE ? END, Result = ?, Updated = ? " +
+                        "WHERE Status = ? AND Updated < ?",
+                        [attempts, WorkQueue.PENDING, WorkQueue.FAILED, json.dumps("Task abandoned"), time.time(), WorkQueue.RUNNING,
+                         time.time() - timeout])
+
+    def results(self):
+        """
+        Reads and removes finished tasks.
+
+        Returns:
+            list of (type, data, result), result is None for failed tasks
+        """
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.db.execute("SELECT Id, Type, Data, Status, Result FROM tasks WHERE Status IN (?, ?) ORDER BY Id",
+                                   [WorkQueue.DONE, WorkQueue.FAILED]).fetchall()
+
+            self.db.executemany("DELETE FROM tasks WHERE Id = ?", [(row[0],) for row in rows])
+        finally:
+            self.db.execute("COMMIT")
+
+        return [(name, json.loads(data), json.loads(result) if status == WorkQueue.DONE else None) for _, name, data, status, result in rows]
+
+    def count(self):
+        """
+        Counts tasks not yet read by the coordinator.
+
+        Returns:
+            number of tasks
+        """
+
+        return self.db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def clear(self):
+        """
+        Removes all tasks.
+        """
+
+        self.db.execute("DELETE FROM tasks")
+
+    def close(self):
+        """
+        Closes the queue.
+        """
+
+        self.db.close()